@@ -1,32 +1,135 @@
+import time
+import threading
 import numpy as np
-from perf_db import get_model_stats
+from config import ADAPTIVE_METRIC, ADAPTIVE_HALF_LIFE, TIMEFRAME_WEIGHTS
+from error_stats import basis_for, tracked_bases
+from perf_db import get_all_error_stats, add_stats_listener, remove_stats_listener
+
+# Metrics kept per basis; lifetime stats only have MAE
+METRICS = ("mae", "mape", "hit_rate")
+
+def _validate(metric, basis):
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+    if basis == "lifetime":
+        if metric != "mae":
+            raise ValueError(f"Lifetime stats only track mae, not {metric!r}")
+    elif basis not in tracked_bases():
+        raise ValueError(f"Half-life basis {basis!r} is not tracked; use one of ERROR_HALF_LIVES, "
+                         f"\"window\" or \"lifetime\" ({tracked_bases()})")
 
 class AdaptiveLayer:
-    """Adaptive MCP layer for self-learning and weight adjustment"""
-    
-    def __init__(self):
+    """Adaptive MCP layer for self-learning and weight adjustment.
+
+    Error stats live in memory per (ticker, timeframe): loaded from the perf
+    DB once, then updated by perf_db after each resolution commits, so
+    computing weights needs no database access. Models are weighted by
+    ``metric`` (mae, mape or hit_rate) over ``half_life``: one of the
+    ERROR_HALF_LIVES hours, "window" or "lifetime" (mae only). Anything
+    else raises ValueError; see error_stats.
+    """
+
+    # Seconds before a failed bulk load is retried; weights use what's in memory meanwhile
+    load_retry_seconds = 30.0
+
+    def __init__(self, metric=ADAPTIVE_METRIC, half_life=ADAPTIVE_HALF_LIFE):
         # Base weights for ensemble
         self.base = {"indicators": 0.35, "numeric": 0.45, "sentiment": 0.2}
+        self.metric = metric
+        self.basis = basis_for(half_life)
+        _validate(self.metric, self.basis)
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._retry_at = 0.0
+        self._pending = None
+        self._listener = add_stats_listener(self.on_stats)
+
+    def close(self):
+        """Stop receiving stats updates"""
+        if self._listener is not None:
+            remove_stats_listener(self._listener)
+            self._listener = None
+
+    def load(self):
+        """Bulk-load every model's stats (startup)"""
+        with self._lock:
+            self._pending = []
+        try:
+            rows = get_all_error_stats()
+        except Exception as e:
+            print(f"Adaptive stats load error: {e}")
+            rows = None
+        with self._lock:
+            # Updates committed while the bulk query ran are newer; apply them last
+            pending, self._pending = self._pending, None
+            if rows is None:
+                self._retry_at = time.monotonic() + self.load_retry_seconds
+                return
+            self._stats = {}
+            self._apply(rows)
+            self._apply(pending)
+            self._loaded = True
+
+    def on_stats(self, rows):
+        """perf_db listener: committed (ticker, timeframe, model, basis, mae, mape, hit_rate, n) rows"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(rows)
+            self._apply(rows)
+
+    def _apply(self, rows):
+        for ticker, timeframe, model, basis, mae, mape, hit_rate, n in rows:
+            self._stats.setdefault((ticker, timeframe, basis), {})[model] = {
+                "model": model, "mae": mae, "mape": mape, "hit_rate": hit_rate, "count": n}
 
-    def compute_model_weights(self, ticker, timeframe):
+    def get_model_stats(self, ticker, timeframe, basis="lifetime"):
+        """In-memory equivalent of perf_db.get_model_stats for one basis"""
+        if not self._loaded and time.monotonic() >= self._retry_at:
+            self.load()
+        with self._lock:
+            return list(self._stats.get((ticker, timeframe, basis), {}).values())
+
+    def compute_model_weights(self, ticker, timeframe, metric=None, half_life=None):
         """Compute adaptive weights based on model performance"""
-        stats = get_model_stats(ticker, timeframe)
-        
+        metric = metric or self.metric
+        basis = self.basis if half_life is None else basis_for(half_life)
+        _validate(metric, basis)
+        stats = self.get_model_stats(ticker, timeframe, basis)
+
+        # Fall back to lifetime MAE until every model has the chosen metric
+        if not stats or any(s[metric] is None for s in stats):
+            metric = "mae"
+            stats = self.get_model_stats(ticker, timeframe)
+
         if not stats:
             return {"arima": 0.5, "lstm": 0.5}
-        
-        inv = []
-        models = []
-        
-        for s in stats:
-            mae = s["mae"] if s["mae"] and s["mae"]>0 else 1e-6
-            inv.append(1.0/mae)
-            models.append(s["model"])
-        
-        inv = np.array(inv)
-        w = inv / inv.sum()
-        
-        return dict(zip(models, w.tolist()))
+
+        vals = np.array([s[metric] if s[metric] and s[metric]>0 else 1e-6 for s in stats])
+        # Hit rate is better when higher; errors when lower
+        score = vals if metric == "hit_rate" else 1.0/vals
+        w = score / score.sum()
+
+        return dict(zip([s["model"] for s in stats], w.tolist()))
+
+    def compute_timeframe_weights(self, ticker, timeframes):
+        """Weights across timeframes: each prior scaled by its model-weighted directional hit rate.
+
+        Hit rate is comparable across horizons where MAE/MAPE are not; a
+        timeframe without resolved hits counts as a coin flip (0.5).
+        """
+        raw = {}
+        for tf in timeframes:
+            prior = TIMEFRAME_WEIGHTS.get(tf, 1.0/len(timeframes))
+            hits = {s["model"]: s["hit_rate"] for s in self.get_model_stats(ticker, tf, self.basis)
+                    if s["hit_rate"] is not None}
+            model_weights = self.compute_model_weights(ticker, tf)
+            total = sum(model_weights.get(m, 0.0) for m in hits)
+            hit = sum(model_weights.get(m, 0.0)*h for m, h in hits.items())/total if total else 0.5
+            raw[tf] = prior * max(hit, 1e-6)
+
+        total = sum(raw.values())
+        return {tf: w/total for tf, w in raw.items()} if total else {}
 
     def adjust_weights_for_ensemble(self, ticker, timeframe):
         """Adjust ensemble weights based on performance"""
@@ -0,0 +1,244 @@
+import os
+import copy
+import time
+import asyncio
+from datetime import datetime
+
+from data_fetcher import fetch_ohlcv, fetch_ohlcv_many
+from pattern_analyzer import detect_patterns
+from sentiment_analyzer import fetch_news_headlines, score_sentiment
+from news_fetcher import news_fetcher, scorable_headlines
+from sentiment_service import get_sentiment_service
+from arima_util import ARIMAForecaster
+from arima_service import arima_service, ARIMAOrderSelector
+from lstm_model import predict_lstm, lstm_model_available
+from ensemble_agent import EnsembleAgent
+from indicators import indicator_engine
+from perf_db import store_prediction
+from executors import run_io
+from config import LSTM_MODEL_DIR, ANALYSIS_RESULT_TTL, ARIMA_ORDER_MODE, ANALYSIS_TIMEFRAMES
+
+# Prediction horizon stored with each forecast, per timeframe
+HORIZON_MINUTES = {"1m": 1, "15m": 15, "1h": 60}
+
+
+class AnalysisEngine:
+    """Shared fetch -> pattern -> sentiment -> ARIMA/LSTM -> store -> ensemble pipeline.
+
+    Concurrent requests for the same ticker and timeframe profile are
+    coalesced into one in-flight run (single-flight). With ``result_ttl`` > 0
+    a finished result is also reused for that many seconds. Every caller gets
+    its own copy of the result. Only the profile's timeframes are fetched and
+    forecast.
+    """
+
+    def __init__(self, ensemble=None, period="2d", intervals=ANALYSIS_TIMEFRAMES,
+                 result_ttl=ANALYSIS_RESULT_TTL):
+        self.ensemble = ensemble or EnsembleAgent()
+        # Fits run in the ARIMA worker pool; timeframes are fitted concurrently
+        self.arima = ARIMAForecaster(fitter=arima_service.fit, batch_fitter=arima_service.fit_many)
+        self.arima_orders = ARIMAOrderSelector(arima_service) if ARIMA_ORDER_MODE == "auto" else None
+        self.period = period
+        # Canonical order, so an explicit full profile shares the default's cache key
+        self.intervals = self._canonical(intervals)
+        if not self.intervals:
+            raise ValueError("AnalysisEngine needs at least one timeframe")
+        self.result_ttl = result_ttl
+        self._inflight = {}
+        self._recent = {}
+        self.stats = {"runs": 0, "coalesced": 0, "cached": 0}
+
+    @staticmethod
+    def _canonical(timeframes):
+        unknown = set(timeframes) - set(HORIZON_MINUTES)
+        if unknown:
+            raise ValueError(f"Unknown timeframes: {sorted(unknown)}")
+        return tuple(tf for tf in HORIZON_MINUTES if tf in timeframes)
+
+    def profile(self, timeframes=None):
+        """Requested timeframes in canonical order; None means the engine default"""
+        return self._canonical(timeframes) if timeframes else self.intervals
+
+    async def analyze(self, ticker, timeframes=None):
+        """Analyze a ticker on ``timeframes`` (default: all), joining an in-flight run if one exists"""
+        key = (ticker.upper(), self.profile(timeframes))
+
+        recent = self._recent.get(key)
+        if recent and time.monotonic() - recent[0] < self.result_ttl:
+            self.stats["cached"] += 1
+            return copy.deepcopy(recent[1])
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["runs"] += 1
+            task = asyncio.ensure_future(self._run(*key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: one caller disconnecting must not cancel the shared run
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _on_done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if self.result_ttl > 0 and not task.cancelled() and task.exception() is None:
+            now = time.monotonic()
+            for k in [k for k, (ts, _) in self._recent.items() if now - ts >= self.result_ttl]:
+                del self._recent[k]
+            self._recent[key] = (now, task.result())
+
+    async def _timed(self, timings, stage, aw):
+        t0 = time.perf_counter()
+        try:
+            return await aw
+        finally:
+            timings[stage] = round((time.perf_counter() - t0) * 1000, 2)
+
+    async def _run(self, ticker, timeframes):
+        timings = {}
+        t0 = time.perf_counter()
+
+        # Fetch data and news concurrently
+        dfs, headlines = await asyncio.gather(
+            self._timed(timings, "fetch", run_io(fetch_ohlcv, ticker, period=self.period, intervals=timeframes)),
+            self._timed(timings, "news", run_io(fetch_news_headlines, ticker, limit=5)),
+        )
+
+        # Detect pattern on 1h
+        t = time.perf_counter()
+        pattern = None
+        if "1h" in dfs and not dfs["1h"].empty:
+            pattern = detect_patterns(dfs["1h"])
+        timings["pattern"] = round((time.perf_counter() - t) * 1000, 2)
+
+        # Sentiment and per-timeframe quant models run concurrently
+        sentiment, tf_results = await asyncio.gather(
+            self._timed(timings, "sentiment", self._sentiment(ticker, headlines)),
+            asyncio.gather(*(self._timed(timings, f"quant_{tf}", self._quant_timeframe(ticker, tf, df))
+                             for tf, df in dfs.items())),
+        )
+        sent_score, sent_reasons = sentiment
+
+        quant_result = {"last_price": None, "tf": {}}
+        for tf, (last, res) in zip(dfs.keys(), tf_results):
+            if last is not None:
+                quant_result["last_price"] = last
+            quant_result["tf"][tf] = res
+
+        # Combine
+        decision = await self._timed(timings, "ensemble",
+                                     run_io(self.ensemble.combine, ticker, quant_result, sent_score))
+        timings["total"] = round((time.perf_counter() - t0) * 1000, 2)
+
+        return {
+            "ticker": ticker,
+            "timeframes": list(timeframes),
+            "pattern": pattern,
+            "sentiment_score": sent_score,
+            "sentiment_reasons": sent_reasons,
+            "quant_result": quant_result,
+            "decision": decision,
+            "timings": timings,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    async def _sentiment(self, ticker, headlines):
+        """LLM sentiment through the shared async service when configured, else TextBlob"""
+        service = get_sentiment_service()
+        if service is None:
+            return await run_io(score_sentiment, headlines, ticker)
+        return await service.score(ticker, headlines)
+
+    async def scan_sentiment(self, tickers):
+        """Sentiment for a watchlist; headlines of all tickers share packed LLM prompts"""
+        tickers = [t.upper() for t in tickers]
+        news = await run_io(news_fetcher.get_many, tickers, limit=5)
+        batch = {t: scorable_headlines(items) for t, items in news.items()}
+        service = get_sentiment_service()
+        if service is None:
+            scores = await asyncio.gather(*(run_io(score_sentiment, h, t) for t, h in batch.items()))
+            results = dict(zip(tickers, scores))
+        else:
+            results = await service.score_many(batch)
+        return [{"ticker": t, "sentiment_score": results[t][0], "sentiment_reasons": results[t][1]}
+                for t in tickers]
+
+    async def scan_arima(self, tickers, interval="1h", period=None):
+        """One-step ARIMA forecasts for a watchlist; all fits are submitted to the pool at once"""
+        tickers = [t.upper() for t in tickers]
+        frames = await run_io(fetch_ohlcv_many, tickers, intervals=(interval,), period=period or self.period)
+        closes = {t: frames[t][interval]['Close'] for t in tickers
+                  if t in frames and not frames[t][interval].empty and len(frames[t][interval]) > 10}
+        # One IO thread waits on the whole batch rather than one per ticker
+        preds = dict(zip(closes, await run_io(self._arima_forecast_many, interval, closes)))
+
+        rows = []
+        for t in tickers:
+            pred = preds.get(t)
+            last = float(closes[t].iloc[-1]) if t in closes else None
+            rows.append({"ticker": t, "arima_pred": pred,
+                         "arima_ret": (pred - last)/last if pred and last else None})
+        return rows
+
+    def _order_for(self, ticker, tf, close):
+        """Selected order in auto mode, else None (the forecaster's fixed order)"""
+        if self.arima_orders is None:
+            return None
+        try:
+            return self.arima_orders.order_for(ticker, tf, close.astype(float).dropna().values)
+        except Exception as e:
+            print(f"ARIMA order selection error: {e}")
+            return None
+
+    def _arima_forecast_many(self, tf, closes):
+        """Forecasts for {ticker: close}, in order; fits go to the pool as one batch"""
+        return self.arima.forecast_many([((t, tf), close, self._order_for(t, tf, close))
+                                         for t, close in closes.items()])
+
+    def _arima_forecast(self, ticker, tf, close):
+        """ARIMA forecast with the fixed order, or the selected one in auto mode"""
+        return self.arima.forecast((ticker, tf), close, self._order_for(ticker, tf, close))
+
+    async def _quant_timeframe(self, ticker, tf, df):
+        """ARIMA + LSTM forecast for one timeframe; returns (last_price, result)"""
+        if df.empty:
+            return None, {"arima_pred": None, "arima_ret": None,
+                          "lstm_pred": None, "lstm_ret": None, "indicators": None}
+
+        try:
+            last = float(df['Close'].iloc[-1])
+        except Exception:
+            last = None
+
+        async def arima():
+            if len(df['Close']) <= 10:
+                return None
+            return await run_io(self._arima_forecast, ticker, tf, df['Close'])
+
+        async def lstm():
+            model_path = os.path.join(LSTM_MODEL_DIR, f"{ticker}_{tf}_lstm.h5")
+            if not lstm_model_available(model_path):
+                return []
+            return await run_io(predict_lstm, model_path, df['Close'].astype(float).tolist(), window=32, steps=1)
+
+        arima_pred, lstm_preds = await asyncio.gather(arima(), lstm())
+        arima_ret = (arima_pred - last)/last if arima_pred and last else None
+        lstm_pred = lstm_preds[0] if lstm_preds else None
+        lstm_ret = (lstm_pred - last)/last if lstm_pred and last else None
+
+        # Store predictions for MCP
+        horizon = HORIZON_MINUTES.get(tf, 1)
+        predicted_at = datetime.utcnow().isoformat()
+        # Queued to the DB writer thread; never waits on the write lock
+        if arima_pred:
+            store_prediction(ticker, tf, "arima", predicted_at, horizon, arima_pred, last)
+        if lstm_pred:
+            store_prediction(ticker, tf, "lstm", predicted_at, horizon, lstm_pred, last)
+
+        # Streaming state: only bars not seen before are folded in
+        indicators = indicator_engine.update(ticker, tf, df)
+
+        return last, {"arima_pred": arima_pred, "arima_ret": arima_ret,
+                      "lstm_pred": lstm_pred, "lstm_ret": lstm_ret, "indicators": indicators}
@@ -0,0 +1,231 @@
+import os
+import queue
+import signal
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import numpy as np
+from config import (ARIMA_WORKERS, ARIMA_FIT_TIMEOUT, ARIMA_ORDER_CRITERION, ARIMA_ORDER_TTL,
+                    ARIMA_MAX_P, ARIMA_MAX_Q, ARIMA_MAX_D)
+from executors import KeyedLocks
+
+
+class ARIMAFitTimeout(Exception):
+    """A fit ran past the per-fit timeout"""
+
+
+def _init_worker(pids):
+    """Report this worker's pid, pre-import statsmodels and run one tiny fit so the first real fit is warm"""
+    pids.put(os.getpid())
+    from arima_util import fit_arima_params
+    rng = np.random.default_rng(0)
+    fit_arima_params(100 + np.cumsum(rng.standard_normal(64)), (1,1,1))
+
+def _on_alarm(signum, frame):
+    raise ARIMAFitTimeout()
+
+def _with_timeout(fn, timeout, *args):
+    # Tasks run on the worker's main thread, so SIGALRM can interrupt the optimiser
+    if timeout:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def _fit_task(values, order, start_params, timeout):
+    from arima_util import fit_arima_params
+    return _with_timeout(fit_arima_params, timeout, values, order, start_params)
+
+def _score_task(values, order, criterion, timeout):
+    from arima_util import score_arima_order
+    try:
+        return _with_timeout(score_arima_order, timeout, values, order, criterion)
+    except ARIMAFitTimeout:
+        return float("inf")
+
+
+class ARIMAService:
+    """Process pool for ARIMA fitting with warm workers and a per-fit timeout.
+
+    Workers are spawned with statsmodels already imported. Each fit is
+    interrupted in the worker after ``fit_timeout`` seconds (SIGALRM); if a
+    worker still does not answer within a grace period the pool is recycled,
+    so a non-converging series can't hold a worker forever.
+    """
+
+    def __init__(self, workers=ARIMA_WORKERS, fit_timeout=ARIMA_FIT_TIMEOUT, grace=5.0):
+        self.workers = workers
+        self.fit_timeout = fit_timeout
+        self.grace = grace
+        self._pool = None
+        self._pids = None
+        self._lock = threading.Lock()
+        self.stats = {"fits": 0, "timeouts": 0, "errors": 0, "recycles": 0}
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context("spawn")
+                # Workers report their pids here so a hung pool can be killed on recycle.
+                # One queue for the service's lifetime: workers of a pool being shut
+                # down may still be starting and unpickling it.
+                if self._pids is None:
+                    self._pids = ctx.Queue()
+                # Forget pids of an earlier pool's workers so a recycle only kills this one's
+                self._drain(self._pids)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                                 initializer=_init_worker, initargs=(self._pids,))
+            return self._pool
+
+    def warm(self):
+        """Start every worker now rather than on the first request"""
+        pool = self._get_pool()
+        for f in [pool.submit(int) for _ in range(self.workers)]:
+            f.result()
+
+    @staticmethod
+    def _drain(pids):
+        out = []
+        while True:
+            try:
+                out.append(pids.get_nowait())
+            except queue.Empty:
+                return out
+
+    def _recycle(self, pool):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.stats["recycles"] += 1
+        # A worker stuck in C code never sees SIGALRM; kill it so shutdown can't hang
+        for pid in self._drain(self._pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _result(self, pool, fut):
+        try:
+            out = fut.result(timeout=self.fit_timeout + self.grace if self.fit_timeout else None)
+            self._count("fits")
+            return out
+        except ARIMAFitTimeout:
+            self._count("timeouts")
+            raise
+        except FutureTimeout:
+            self._count("timeouts")
+            self._recycle(pool)
+            raise ARIMAFitTimeout()
+        except Exception:
+            self._count("errors")
+            raise
+
+    def submit_fit(self, values, order=(2,1,2), start_params=None):
+        """Queue one fit; returns (pool, Future) for ``result``"""
+        pool = self._get_pool()
+        return pool, pool.submit(_fit_task, np.asarray(values, dtype=float), tuple(order),
+                                 start_params, self.fit_timeout)
+
+    def fit(self, values, order=(2,1,2), start_params=None):
+        """Fit and return the parameter vector (blocking; used as the ARIMAForecaster fitter)"""
+        return self._result(*self.submit_fit(values, order, start_params))
+
+    def fit_many(self, jobs):
+        """Fit many (values, order, start_params) jobs in parallel; None for failed fits"""
+        pending = [self.submit_fit(*job) for job in jobs]
+        out = []
+        for pool, fut in pending:
+            try:
+                out.append(self._result(pool, fut))
+            except Exception as e:
+                print(f"ARIMA fit error: {e!r}")
+                out.append(None)
+        return out
+
+    def score_many(self, values, orders, criterion="aic"):
+        """Score candidate orders on one series in parallel; inf for failed fits"""
+        pool = self._get_pool()
+        values = np.asarray(values, dtype=float)
+        pending = [pool.submit(_score_task, values, tuple(o), criterion, self.fit_timeout) for o in orders]
+        out = []
+        for fut in pending:
+            try:
+                out.append(self._result(pool, fut))
+            except Exception as e:
+                print(f"ARIMA order scoring error: {e!r}")
+                out.append(float("inf"))
+        return out
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ARIMAOrderSelector:
+    """Chosen ARIMA order per (ticker, timeframe), searched rarely and cached in the perf DB.
+
+    ``order_for`` returns the stored order while it is unexpired; otherwise it
+    runs a stepwise AIC/BIC search on the service's pool and stores the result
+    for ``ttl`` seconds. Searches for the same key never run twice at once.
+    """
+
+    def __init__(self, service, criterion=ARIMA_ORDER_CRITERION, ttl=ARIMA_ORDER_TTL,
+                 max_p=ARIMA_MAX_P, max_q=ARIMA_MAX_Q, max_d=ARIMA_MAX_D):
+        self.service = service
+        self.criterion = criterion
+        self.ttl = ttl
+        self.max_p, self.max_q, self.max_d = max_p, max_q, max_d
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLocks()
+        self.stats = {"searches": 0, "db_hits": 0, "memo_hits": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def order_for(self, ticker, timeframe, values):
+        """Order to use for this series"""
+        from perf_db import get_arima_order, store_arima_order
+        from arima_util import stepwise_order_search
+
+        key = (ticker, timeframe)
+        with self._key_locks.hold(key):
+            hit = self._memo.get(key)
+            if hit and hit[1] > time.time():
+                self._count("memo_hits")
+                return hit[0]
+
+            row = get_arima_order(ticker, timeframe, self.criterion)
+            if row is not None:
+                self._memo[key] = row
+                self._count("db_hits")
+                return row[0]
+
+            t0 = time.perf_counter()
+            order, score, fitted = stepwise_order_search(
+                values, lambda v, orders: self.service.score_many(v, orders, self.criterion),
+                max_p=self.max_p, max_q=self.max_q, max_d=self.max_d)
+            expires_at = time.time() + self.ttl
+            store_arima_order(ticker, timeframe, order, self.criterion, score, fitted, expires_at)
+            self._memo[key] = (order, expires_at)
+            self._count("searches")
+            print(f"ARIMA order for {ticker} {timeframe}: {order} {self.criterion}={score:.2f} "
+                  f"({fitted} fits, {time.perf_counter() - t0:.1f}s)")
+            return order
+
+
+# Shared service used by the analysis engine
+arima_service = ARIMAService()
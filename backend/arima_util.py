@@ -1,5 +1,12 @@
 from statsmodels.tsa.arima.model import ARIMA
+import time
+import warnings
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+from config import ARIMA_REFIT_SECONDS, ARIMA_MAX_APPENDS, ARIMA_MAX_STATES
+from executors import KeyedLocks
 
 def arima_one_step_forecast(series, order=(2,1,2)):
     """Perform ARIMA forecast for one step ahead"""
@@ -11,3 +18,230 @@ def arima_one_step_forecast(series, order=(2,1,2)):
     except Exception as e:
         print(f"ARIMA forecast error: {e}")
         return None
+
+def fit_arima_params(values, order=(2,1,2), start_params=None):
+    """Fit ARIMA on a float array and return the parameter vector (runs in worker processes)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        res = ARIMA(np.asarray(values, dtype=float), order=order).fit(start_params=start_params)
+    return np.asarray(res.params)
+
+def score_arima_order(values, order, criterion="aic"):
+    """Information criterion of one fitted order; inf if the fit fails"""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            res = ARIMA(np.asarray(values, dtype=float), order=order).fit()
+        score = float(getattr(res, criterion))
+        return score if np.isfinite(score) else float("inf")
+    except Exception:
+        return float("inf")
+
+def choose_d(values, max_d=2, alpha=0.05):
+    """Smallest differencing order whose series passes the ADF stationarity test"""
+    from statsmodels.tsa.stattools import adfuller
+    x = np.asarray(values, dtype=float)
+    for d in range(max_d + 1):
+        if len(x) < 20:
+            return d
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                pvalue = adfuller(x, autolag="AIC")[1]
+            if pvalue < alpha:
+                return d
+        except Exception:
+            return d
+        x = np.diff(x)
+    return max_d
+
+def stepwise_order_search(values, score_many, max_p=5, max_q=5, max_d=2, max_pq=6):
+    """Hyndman-Khandakar style stepwise (p,d,q) search.
+
+    d comes from repeated ADF tests, so only (p, q) is searched. Starting
+    from a few standard orders, each round scores the unvisited neighbours
+    (p±1, q±1) of the current best in one ``score_many`` batch and stops
+    when none of them improves on it. Returns (order, score, orders_fitted).
+    """
+    d = choose_d(values, max_d)
+    seen = {}
+
+    def evaluate(cands):
+        cands = [c for c in dict.fromkeys(cands)
+                 if c not in seen and 0 <= c[0] <= max_p and 0 <= c[1] <= max_q and c[0] + c[1] <= max_pq]
+        if cands:
+            for c, score in zip(cands, score_many(values, [(p, d, q) for p, q in cands])):
+                seen[c] = score
+
+    evaluate([(2, 2), (0, 0), (1, 0), (0, 1)])
+    best = min(seen, key=seen.get)
+    while True:
+        p, q = best
+        evaluate([(p+1, q), (p-1, q), (p, q+1), (p, q-1), (p+1, q+1), (p-1, q-1)])
+        step = min(seen, key=seen.get)
+        if seen[step] >= seen[best]:
+            break
+        best = step
+    return (best[0], d, best[1]), seen[best], len(seen)
+
+def _filter(values, order, params):
+    """Rebuild fitted results from known params with one Kalman filter pass (no optimisation)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ARIMA(np.asarray(values, dtype=float), order=order).filter(params)
+
+
+class _State:
+    __slots__ = ("results", "params", "order", "last_ts", "last_value", "fitted_at", "appended", "forecast")
+
+
+class ARIMAForecaster:
+    """One-step ARIMA forecasts with fitted state cached per (ticker, timeframe).
+
+    The first request for a series fits the model. Later requests reuse the
+    fitted parameters: new bars are folded in with ``results.append``
+    (a filter pass, no optimisation), a revised last bar is re-filtered, and
+    an unchanged series returns the cached forecast. A full refit, warm-started
+    from the previous parameters, happens every ``refit_seconds`` or after
+    ``max_appends`` appended bars. ``forecast_many`` hands every fit a batch
+    needs to ``batch_fitter`` in one call.
+    """
+
+    def __init__(self, order=(2,1,2), refit_seconds=ARIMA_REFIT_SECONDS, max_appends=ARIMA_MAX_APPENDS,
+                 max_states=ARIMA_MAX_STATES, fitter=fit_arima_params, batch_fitter=None):
+        self.order = tuple(order)
+        self.refit_seconds = refit_seconds
+        self.max_appends = max_appends
+        self.max_states = max_states
+        self._fit = fitter
+        self._fit_many = batch_fitter or self._fit_each
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLocks()
+        self.stats = {"fits": 0, "appends": 0, "refilters": 0, "hits": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _fit_each(self, jobs):
+        out = []
+        for job in jobs:
+            try:
+                out.append(self._fit(*job))
+            except Exception as e:
+                print(f"ARIMA fit error: {e!r}")
+                out.append(None)
+        return out
+
+    def _get(self, key, order):
+        with self._lock:
+            st = self._states.get(key)
+            if st is not None:
+                self._states.move_to_end(key)
+        return st if st is not None and st.order == order else None
+
+    def _put(self, key, st):
+        with self._lock:
+            self._states[key] = st
+            while len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+
+    def forecast(self, key, series, order=None):
+        """One-step-ahead forecast for ``series`` (a Close series), reusing cached state for ``key``"""
+        order = tuple(order or self.order)
+        try:
+            series = series.astype(float).dropna()
+            with self._key_locks.hold(key):
+                st = self._update(self._get(key, order), series, order)
+                self._put(key, st)
+                return st.forecast
+        except Exception as e:
+            print(f"ARIMA forecast error: {e}")
+            return None
+
+    def forecast_many(self, items):
+        """Forecasts for many (key, series, order) items; None where a forecast failed.
+
+        Cached states are updated in place; the full fits still needed are
+        run together in one ``batch_fitter`` call.
+        """
+        out = [None] * len(items)
+        jobs, pending = [], []
+        for i, (key, series, order) in enumerate(items):
+            order = tuple(order or self.order)
+            try:
+                series = series.astype(float).dropna()
+                with self._key_locks.hold(key):
+                    st = self._get(key, order)
+                    if self._due(st, series):
+                        jobs.append((series.values, order, st.params if st is not None else None))
+                        pending.append((i, key, series, order))
+                        continue
+                    st = self._update(st, series, order)
+                    self._put(key, st)
+                    out[i] = st.forecast
+            except Exception as e:
+                print(f"ARIMA forecast error: {e}")
+
+        for (i, key, series, order), params in zip(pending, self._fit_many(jobs) if jobs else []):
+            if params is None:
+                continue
+            try:
+                with self._key_locks.hold(key):
+                    st = self._fitted(series, order, params)
+                    self._put(key, st)
+                    out[i] = st.forecast
+            except Exception as e:
+                print(f"ARIMA forecast error: {e}")
+        return out
+
+    def _due(self, st, series):
+        """Whether ``series`` needs a full fit rather than an append or re-filter"""
+        return (st is None
+                or time.monotonic() - st.fitted_at >= self.refit_seconds
+                or st.appended >= self.max_appends
+                or st.last_ts not in series.index)
+
+    def _fitted(self, series, order, params):
+        st = _State()
+        st.params = params
+        st.order = order
+        st.results = _filter(series.values, order, params)
+        st.fitted_at = time.monotonic()
+        st.appended = 0
+        self._count("fits")
+        return self._finish(st, series)
+
+    def _finish(self, st, series):
+        st.last_ts = series.index[-1]
+        st.last_value = series.values[-1]
+        st.forecast = float(np.asarray(st.results.forecast(steps=1))[0])
+        return st
+
+    def _update(self, st, series, order):
+        values = series.values
+
+        if not self._due(st, series):
+            pos = series.index.get_loc(st.last_ts)
+            if series.iloc[pos] == st.last_value:
+                new = values[pos+1:]
+                if len(new) == 0:
+                    self._count("hits")
+                    return st
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    st.results = st.results.append(new, refit=False)
+                st.appended += len(new)
+                self._count("appends")
+            else:
+                # The last bar was still forming when we saw it; re-filter with known params
+                st.results = _filter(values, order, st.params)
+                st.appended = 0
+                self._count("refilters")
+        else:
+            # Warm start from the previous params when we have them
+            start = st.params if st is not None else None
+            return self._fitted(series, order, self._fit(values, order, start))
+
+        return self._finish(st, series)
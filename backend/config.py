@@ -10,3 +10,94 @@ BASE_TELEGRAM_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 LSTM_MODEL_DIR = os.getenv("LSTM_MODEL_DIR", "./data/models")
 PERF_DB_PATH = os.getenv("PERF_DB_PATH", "./data/perf.db")
+
+# Executor sizing for the non-blocking request pipeline
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+
+# Seconds a finished analysis is reused for repeat requests of the same ticker (0 = off).
+# Reused results skip store_prediction, so they don't feed the adaptive stats.
+ANALYSIS_RESULT_TTL = float(os.getenv("ANALYSIS_RESULT_TTL", "0"))
+
+# Memory cap for the process-wide OHLCV cache
+OHLCV_CACHE_MAX_MB = int(os.getenv("OHLCV_CACHE_MAX_MB", "256"))
+
+# Max symbols per batched yf.download call
+YF_BATCH_SIZE = int(os.getenv("YF_BATCH_SIZE", "50"))
+
+# Market data source: "yfinance" (live) or "replay" (recorded files, offline)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+REPLAY_DATA_DIR = os.getenv("REPLAY_DATA_DIR", "./data/replay")
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+# Zone replayed bar times are converted to (recorded CSVs carry per-row UTC offsets)
+REPLAY_TZ = os.getenv("REPLAY_TZ", "America/New_York")
+
+# Memory budget for resident LSTM models
+LSTM_REGISTRY_MAX_MB = int(os.getenv("LSTM_REGISTRY_MAX_MB", "512"))
+
+# LSTM micro-batching: max windows per call and how long to wait for more
+LSTM_BATCH_MAX = int(os.getenv("LSTM_BATCH_MAX", "64"))
+LSTM_BATCH_WAIT_MS = float(os.getenv("LSTM_BATCH_WAIT_MS", "5"))
+
+# Train from a tf.data stream once materialised windows would exceed this size
+LSTM_STREAM_MIN_BYTES = int(os.getenv("LSTM_STREAM_MIN_BYTES", str(512 * 1024 * 1024)))
+
+# ARIMA state cache: full refit interval, max bars appended between refits, max cached series
+ARIMA_REFIT_SECONDS = float(os.getenv("ARIMA_REFIT_SECONDS", "3600"))
+ARIMA_MAX_APPENDS = int(os.getenv("ARIMA_MAX_APPENDS", "240"))
+ARIMA_MAX_STATES = int(os.getenv("ARIMA_MAX_STATES", "2000"))
+
+# ARIMA fitting pool: worker processes and seconds before a fit is abandoned
+ARIMA_WORKERS = int(os.getenv("ARIMA_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+ARIMA_FIT_TIMEOUT = float(os.getenv("ARIMA_FIT_TIMEOUT", "20"))
+
+# ARIMA order: "fixed" uses (2,1,2); "auto" runs a stepwise AIC/BIC search per
+# (ticker, timeframe) and reuses the stored result for ARIMA_ORDER_TTL seconds
+ARIMA_ORDER_MODE = os.getenv("ARIMA_ORDER_MODE", "fixed")
+ARIMA_ORDER_CRITERION = os.getenv("ARIMA_ORDER_CRITERION", "aic")
+ARIMA_ORDER_TTL = float(os.getenv("ARIMA_ORDER_TTL", str(7 * 24 * 3600)))
+ARIMA_MAX_P = int(os.getenv("ARIMA_MAX_P", "5"))
+ARIMA_MAX_Q = int(os.getenv("ARIMA_MAX_Q", "5"))
+ARIMA_MAX_D = int(os.getenv("ARIMA_MAX_D", "2"))
+
+# Per-headline sentiment cache: seconds a score is reused, max entries, optional sqlite file
+SENTIMENT_CACHE_TTL = float(os.getenv("SENTIMENT_CACHE_TTL", "21600"))
+SENTIMENT_CACHE_MAX = int(os.getenv("SENTIMENT_CACHE_MAX", "20000"))
+SENTIMENT_CACHE_DB = os.getenv("SENTIMENT_CACHE_DB", "")
+
+# LLM sentiment: backend ("gemini" or "http" for a compatible/mock endpoint), calls in
+# flight, retries on 429, headlines packed into one prompt, and seconds to wait for a reply
+SENTIMENT_LLM_BACKEND = os.getenv("SENTIMENT_LLM_BACKEND", "gemini")
+SENTIMENT_LLM_URL = os.getenv("SENTIMENT_LLM_URL", "http://127.0.0.1:8765/generate")
+SENTIMENT_LLM_CONCURRENCY = int(os.getenv("SENTIMENT_LLM_CONCURRENCY", "4"))
+SENTIMENT_LLM_RETRIES = int(os.getenv("SENTIMENT_LLM_RETRIES", "4"))
+SENTIMENT_PACK_SIZE = int(os.getenv("SENTIMENT_PACK_SIZE", "40"))
+SENTIMENT_LLM_TIMEOUT = float(os.getenv("SENTIMENT_LLM_TIMEOUT", "30"))
+
+# News: seconds a ticker's headlines are reused, and stories kept for cross-ticker dedup
+NEWS_TTL = float(os.getenv("NEWS_TTL", "300"))
+NEWS_MAX_STORIES = int(os.getenv("NEWS_MAX_STORIES", "5000"))
+
+# SQLite: how long a connection waits on a locked database before failing
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Streaming per-model error stats: exponential-decay half-lives (hours) and rolling window (resolutions)
+ERROR_HALF_LIVES = [float(h) for h in os.getenv("ERROR_HALF_LIVES", "24,168").split(",") if h.strip()]
+ERROR_WINDOW = int(os.getenv("ERROR_WINDOW", "50"))
+
+# What AdaptiveLayer weights models by: mae, mape or hit_rate, over a
+# half-life in hours, "window" (last ERROR_WINDOW resolutions) or "lifetime"
+ADAPTIVE_METRIC = os.getenv("ADAPTIVE_METRIC", "mape")
+ADAPTIVE_HALF_LIFE = os.getenv("ADAPTIVE_HALF_LIFE", "168")
+
+# Multi-timeframe ensemble: timeframes analyzed when a request names none, and each
+# timeframe's prior weight (scaled per ticker by its recent directional hit rate)
+ANALYSIS_TIMEFRAMES = tuple(t.strip() for t in os.getenv("ANALYSIS_TIMEFRAMES", "1m,15m,1h").split(",") if t.strip())
+TIMEFRAME_WEIGHTS = {tf: float(w) for tf, w in
+                     (p.split(":") for p in os.getenv("TIMEFRAME_WEIGHTS", "1m:0.2,15m:0.3,1h:0.5").split(",") if p.strip())}
+
+# Fractional return an indicator score of +/-1 stands for, so the indicator term is on
+# the scale of the ARIMA/LSTM returns (and the arima_ret fallback) it is blended with
+INDICATOR_RET_SCALE = float(os.getenv("INDICATOR_RET_SCALE", "0.01"))
+
+# Exchange-local time the regular session closes; the day's last intraday bar ends here
+SESSION_CLOSE = os.getenv("SESSION_CLOSE", "16:00")
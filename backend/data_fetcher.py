@@ -1,22 +1,77 @@
-import yfinance as yf
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from ohlcv_cache import OHLCVCache
+from market_data import get_provider
+from indicators import indicator_engine
+from config import OHLCV_CACHE_MAX_MB, YF_BATCH_SIZE
+
+def _download_many(tickers, interval, period=None, start=None):
+    """One batched provider download; returns {ticker: DataFrame}, or {ticker: None} on error"""
+    tickers = list(tickers)
+    try:
+        return get_provider().download(tickers, interval, period=period, start=start)
+    except Exception as e:
+        print(f"Error fetching {','.join(tickers)} {interval}: {e}")
+        return {t: None for t in tickers}
+
+def _download(ticker: str, interval: str, period=None, start=None):
+    """Download one (ticker, interval) frame; returns None on error"""
+    return _download_many([ticker], interval, period=period, start=start)[ticker]
+
+# Process-wide cache shared by the request path and the scheduler
+ohlcv_cache = OHLCVCache(_download, max_bytes=OHLCV_CACHE_MAX_MB * 1024 * 1024)
+# New bars update the streaming indicators as they arrive
+ohlcv_cache.subscribe(indicator_engine.on_bars)
 
 def fetch_ohlcv(ticker: str, period="7d", intervals=("1m","15m","1h")) -> dict:
-    """Fetch multi-timeframe OHLCV data via yfinance"""
+    """Fetch multi-timeframe OHLCV data (served from the OHLCV cache)"""
     out = {}
     for interval in intervals:
-        try:
-            df = yf.download(tickers=ticker, period=period, interval=interval, progress=False)
-            # ensure DataFrame has columns
-            if isinstance(df, pd.DataFrame) and not df.empty:
-                # Handle multi-level columns from yfinance
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
-                
-                out[interval] = df[['Open','High','Low','Close','Volume']].dropna()
-            else:
-                out[interval] = pd.DataFrame()
-        except Exception as e:
-            print(f"Error fetching {ticker} {interval}: {e}")
-            out[interval] = pd.DataFrame()
+        out[interval] = ohlcv_cache.get(ticker, interval, period=period)
     return out
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i+size]
+
+def fetch_ohlcv_many(tickers, intervals=("1m","15m","1h"), period="2d", batch_size=YF_BATCH_SIZE) -> dict:
+    """Fetch OHLCV for many tickers in batched downloads; returns {ticker: {interval: df}}
+
+    Fresh frames come straight from the cache. The rest are grouped into
+    provider downloads of up to ``batch_size`` symbols (full history for new
+    tickers, bars since the oldest cached timestamp for stale ones), and each
+    interval is fetched concurrently.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    out = {t: {} for t in tickers}
+
+    def fetch_interval(interval):
+        full, stale, last_ts = [], [], {}
+        for t in tickers:
+            df = ohlcv_cache.cached(t, interval, period)
+            if df is not None:
+                out[t][interval] = df
+                continue
+            ts = ohlcv_cache.last_timestamp(t, interval, period)
+            if ts is not None:
+                stale.append(t)
+                last_ts[t] = ts
+            else:
+                full.append(t)
+
+        for batch in _chunks(full, batch_size):
+            frames = _download_many(batch, interval, period=period)
+            for t in batch:
+                out[t][interval] = ohlcv_cache.put(t, interval, period, frames.get(t))
+
+        for batch in _chunks(stale, batch_size):
+            start = min(last_ts[t] for t in batch)
+            frames = _download_many(batch, interval, start=start)
+            for t in batch:
+                out[t][interval] = ohlcv_cache.append(t, interval, frames.get(t), period)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(intervals))) as ex:
+        list(ex.map(fetch_interval, intervals))
+
+    # Keep the caller's interval order
+    return {t: {i: out[t].get(i, pd.DataFrame()) for i in intervals} for t in tickers}
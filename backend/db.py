@@ -0,0 +1,162 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+from config import PERF_DB_PATH, DB_BUSY_TIMEOUT_MS
+
+# Writes are grouped into one transaction of at most this many jobs
+WRITE_BATCH = 256
+
+_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",    # safe with WAL; fsync at checkpoints only
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache per connection
+    "PRAGMA mmap_size=134217728",
+]
+
+
+class Database:
+    """SQLite access with persistent per-thread connections and a single writer thread.
+
+    Every thread reuses its own connection (WAL mode, so readers never wait
+    for the writer). Writes go through ``write``: jobs are queued and
+    applied by one background thread, many per transaction, so request
+    handlers never block on the write lock. ``write`` returns a Future for
+    callers that need the result; ``flush`` waits for everything queued.
+    """
+
+    def __init__(self, path, busy_timeout_ms=DB_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+        self.stats = {"writes": 0, "transactions": 0, "failed_writes": 0}
+        d = os.path.dirname(path)
+        os.makedirs(d if d else '.', exist_ok=True)
+
+    def _open(self):
+        con = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        for p in _PRAGMAS:
+            con.execute(p)
+        return con
+
+    def connection(self):
+        """This thread's connection (autocommit; use ``transaction`` to group statements)"""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = self._open()
+        return con
+
+    @contextmanager
+    def transaction(self, con=None):
+        """BEGIN IMMEDIATE ... COMMIT on this thread's connection, rolled back on error"""
+        con = con or self.connection()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        """All rows of a read query"""
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def write(self, fn, *args):
+        """Queue ``fn(con, *args)`` for the writer thread; returns a Future with its result"""
+        fut = Future()
+        self._ensure_writer()
+        self._queue.put((fn, args, fut))
+        return fut
+
+    def flush(self):
+        """Block until every write queued so far has been applied"""
+        self.write(lambda con: None).result()
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        con = self._open()
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < WRITE_BATCH:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(job is None for job in jobs):
+                self._apply(con, [j for j in jobs if j is not None])
+                con.close()
+                return
+            self._apply(con, jobs)
+
+    def _apply(self, con, jobs):
+        if not jobs:
+            return
+        results = []
+        try:
+            with self.transaction(con):
+                for fn, args, fut in jobs:
+                    # A savepoint per job: one failing write doesn't undo the others
+                    con.execute("SAVEPOINT job")
+                    try:
+                        results.append((fut, True, fn(con, *args)))
+                        con.execute("RELEASE job")
+                    except Exception as e:
+                        con.execute("ROLLBACK TO job")
+                        con.execute("RELEASE job")
+                        results.append((fut, False, e))
+        except Exception as e:
+            results = [(fut, False, e) for _, _, fut in jobs]
+        for fut, ok, value in results:
+            if ok:
+                fut.set_result(value)
+            else:
+                print(f"DB write error: {value}")
+                fut.set_exception(value)
+        with self._lock:
+            self.stats["transactions"] += 1
+            self.stats["writes"] += sum(ok for _, ok, _ in results)
+            self.stats["failed_writes"] += sum(not ok for _, ok, _ in results)
+
+    def close(self):
+        """Apply pending writes and stop the writer thread"""
+        with self._lock:
+            writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+
+
+_databases = {}
+_db_lock = threading.Lock()
+
+def get_db(path=None):
+    """Shared Database for ``path`` (default: the perf DB)"""
+    path = path or PERF_DB_PATH
+    with _db_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = Database(path)
+        return db
+
+def close_databases():
+    """Flush and stop every writer (app shutdown)"""
+    with _db_lock:
+        dbs = list(_databases.values())
+    for db in dbs:
+        db.close()
@@ -1,4 +1,5 @@
 from adaptive_layer import AdaptiveLayer
+from config import INDICATOR_RET_SCALE
 import numpy as np
 
 class EnsembleAgent:
@@ -8,32 +9,59 @@ class EnsembleAgent:
         self.adaptive = AdaptiveLayer()
         self.base = {"indicators": 0.35, "numeric": 0.45, "sentiment": 0.2}
 
-    def combine(self, ticker, quant_result, sentiment_score):
-        """Combine all signals to make a trading decision"""
-        timeframe = "1h"  # Decision based on 1h by default
-        
+    def _timeframe_scores(self, ticker, timeframe, res):
+        """(numeric_score, indicator_score) for one timeframe; None where it has no signal"""
         # Compute numeric score from arima & lstm using adaptive weights
         model_weights = self.adaptive.compute_model_weights(ticker, timeframe)
         numeric_vals = []
         wts = []
-        
-        tf = quant_result.get("tf", {})
-        t1 = tf.get("1h", {})
-        
-        if t1.get("arima_ret") is not None:
-            numeric_vals.append(t1.get("arima_ret"))
+
+        if res.get("arima_ret") is not None:
+            numeric_vals.append(res.get("arima_ret"))
             wts.append(model_weights.get("arima", 0.5))
-        
-        if t1.get("lstm_ret") is not None:
-            numeric_vals.append(t1.get("lstm_ret"))
+
+        if res.get("lstm_ret") is not None:
+            numeric_vals.append(res.get("lstm_ret"))
             wts.append(model_weights.get("lstm", 0.5))
-        
-        numeric_score = sum(v*w for v,w in zip(numeric_vals, wts))/sum(wts) if numeric_vals else 0.0
 
-        # Indicator score based on arima trend
-        indicator_score = 0.0
-        if t1.get("arima_ret"):
-            indicator_score = t1["arima_ret"]
+        numeric_score = sum(v*w for v,w in zip(numeric_vals, wts))/sum(wts) if numeric_vals and sum(wts) else None
+
+        # Indicator score from RSI/EMA/MACD/Bollinger, in [-1, 1] and so scaled to return
+        # units like the arima trend it falls back to; the thresholds in _decide assume that
+        indicator_score = None
+        if res.get("indicators"):
+            indicator_score = res["indicators"]["score"] * INDICATOR_RET_SCALE
+        elif res.get("arima_ret"):
+            indicator_score = res["arima_ret"]
+
+        return numeric_score, indicator_score
+
+    @staticmethod
+    def _fuse(scores, tf_weights):
+        """Weighted mean over the timeframes that produced a score"""
+        pairs = [(s, tf_weights.get(tf, 0.0)) for tf, s in scores.items() if s is not None]
+        total = sum(w for _, w in pairs)
+        return sum(s*w for s, w in pairs)/total if total else 0.0
+
+    @staticmethod
+    def _decide(combined):
+        """(action, confidence) for a combined score"""
+        conf = min(1.0, max(0.0, abs(combined)))  # Confidence
+        if combined > 0.02 and conf > 0.3:
+            return "BUY", conf
+        if combined < -0.02 and conf > 0.3:
+            return "SELL", conf
+        return "HOLD", conf
+
+    def combine(self, ticker, quant_result, sentiment_score):
+        """Combine all signals to make a trading decision"""
+        tf = quant_result.get("tf", {})
+
+        # Fuse every analyzed timeframe with adaptive per-timeframe weights
+        per_tf = {timeframe: self._timeframe_scores(ticker, timeframe, res) for timeframe, res in tf.items() if res}
+        tf_weights = self.adaptive.compute_timeframe_weights(ticker, list(per_tf))
+        numeric_score = self._fuse({t: s[0] for t, s in per_tf.items()}, tf_weights)
+        indicator_score = self._fuse({t: s[1] for t, s in per_tf.items()}, tf_weights)
         
         # Sentiment score already normalized to [-1, 1]
         s_score = sentiment_score
@@ -43,15 +71,8 @@ class EnsembleAgent:
                     self.base["numeric"]*numeric_score +
                     self.base["sentiment"]*s_score)
 
-        conf = min(1.0, max(0.0, abs(combined)))  # Confidence
-        
         # Make decision
-        if combined > 0.02 and conf > 0.3:
-            action = "BUY"
-        elif combined < -0.02 and conf > 0.3:
-            action = "SELL"
-        else:
-            action = "HOLD"
+        action, conf = self._decide(combined)
         
         return {
             "action": action, 
@@ -59,5 +80,7 @@ class EnsembleAgent:
             "combined": combined,
             "numeric_score": numeric_score,
             "indicator_score": indicator_score,
-            "sentiment_score": s_score
+            "sentiment_score": s_score,
+            "timeframe_weights": tf_weights,
+            "timeframe_scores": {t: {"numeric": n, "indicators": i} for t, (n, i) in per_tf.items()}
         }
@@ -0,0 +1,83 @@
+from config import ERROR_HALF_LIVES, ERROR_WINDOW, ADAPTIVE_HALF_LIFE
+
+# Running state per (series, basis):
+# (weight, abs_sum, pct_sum, hit_weight, hit_sum, newest_ts, seq)
+# Means are sum / weight, so MAE, MAPE and hit rate are O(1) to read and update.
+EMPTY = (0.0, 0.0, 0.0, 0.0, 0.0, None, 0)
+
+
+def decay_basis(half_life_hours):
+    return f"hl{half_life_hours:g}"
+
+def window_basis(size):
+    return f"w{int(size)}"
+
+def parse_basis(basis):
+    """("decay", hours), ("window", size) or ("lifetime", None)"""
+    if basis.startswith("hl"):
+        return "decay", float(basis[2:])
+    if basis.startswith("w"):
+        return "window", int(basis[1:])
+    return "lifetime", None
+
+def basis_for(half_life):
+    """Basis name for a half-life setting: hours, "window" or "lifetime" """
+    if half_life in (None, "", "lifetime"):
+        return "lifetime"
+    if half_life == "window":
+        return window_basis(ERROR_WINDOW)
+    return decay_basis(float(half_life))
+
+def tracked_bases():
+    """Every basis maintained on resolution: configured half-lives, the window, and the adaptive choice"""
+    bases = [decay_basis(h) for h in ERROR_HALF_LIVES] + [window_basis(ERROR_WINDOW)]
+    chosen = basis_for(ADAPTIVE_HALF_LIFE)
+    if chosen != "lifetime" and chosen not in bases:
+        bases.append(chosen)
+    return bases
+
+
+def observe(predicted, actual, base=None):
+    """(abs_err, pct_err, hit) for one resolved forecast; hit is None without a base price
+    or when the forecast called no direction"""
+    abs_err = abs(actual - predicted)
+    pct_err = abs_err / abs(actual) if actual else 0.0
+    hit = None
+    if base is not None and predicted != base:
+        hit = int((predicted - base) * (actual - base) > 0)
+    return abs_err, pct_err, hit
+
+
+def decay_add(state, obs, ts, half_life_hours):
+    """Fold ``obs`` observed at epoch ``ts`` into an exponentially decayed state"""
+    w, a, p, hw, h, newest, seq = state
+    hl = half_life_hours * 3600.0
+    g = 1.0
+    if newest is None or ts >= newest:
+        if newest is not None:
+            f = 0.5 ** ((ts - newest) / hl)
+            w, a, p, hw, h = w * f, a * f, p * f, hw * f, h * f
+        newest = ts
+    else:
+        # Resolved out of order: enters already decayed to the newest time seen
+        g = 0.5 ** ((newest - ts) / hl)
+    abs_err, pct_err, hit = obs
+    w, a, p = w + g, a + g * abs_err, p + g * pct_err
+    if hit is not None:
+        hw, h = hw + g, h + g * hit
+    return (w, a, p, hw, h, newest, seq + 1)
+
+
+def window_add(state, obs, evicted=None):
+    """Add ``obs`` to a rolling-window state, dropping the ``evicted`` observation it replaces"""
+    w, a, p, hw, h, newest, seq = state
+    abs_err, pct_err, hit = obs
+    w, a, p = w + 1, a + abs_err, p + pct_err
+    if hit is not None:
+        hw, h = hw + 1, h + hit
+    if evicted is not None:
+        e_abs, e_pct, e_hit = evicted
+        w, a, p = w - 1, max(0.0, a - e_abs), max(0.0, p - e_pct)
+        if e_hit is not None:
+            hw, h = hw - 1, max(0.0, h - e_hit)
+    return (w, a, p, hw, h, newest, seq + 1)
@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from config import IO_WORKERS
+
+# Bounded pool shared by the request handlers so blocking work never runs
+# on the event loop. I/O (HTTP, sqlite, Gemini) goes to threads; CPU-bound
+# ARIMA fitting has its own process pool in arima_service.
+_io_executor = None
+
+def get_io_executor():
+    """Return the shared thread pool for blocking I/O"""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+    return _io_executor
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O call in the thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(fn, *args, **kwargs))
+
+def shutdown_executors():
+    """Shut down the I/O pool (called on app shutdown)"""
+    global _io_executor
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
+
+
+class KeyedLocks:
+    """One lock per key, created on first use and dropped once no thread holds or waits for it"""
+
+    def __init__(self):
+        self._locks = {}  # key -> [lock, holders + waiters]
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, key):
+        """``with locks.hold(key):`` serialises work on ``key`` only"""
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self):
+        with self._guard:
+            return len(self._locks)
@@ -0,0 +1,218 @@
+import math
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+from executors import KeyedLocks
+
+# RSI / EMA / MACD / Bollinger Bands, computed two ways with identical results:
+# compute_indicators() over a whole frame, and IndicatorState which updates in
+# constant time per bar so streaming data never recomputes history.
+
+RSI_PERIOD = 14
+EMA_FAST = 12
+EMA_SLOW = 26
+MACD_SIGNAL = 9
+BB_PERIOD = 20
+BB_STD = 2.0
+
+COLUMNS = ["rsi", "ema_fast", "ema_slow", "macd", "macd_signal", "macd_hist",
+           "bb_mid", "bb_upper", "bb_lower", "bb_pctb"]
+
+
+def _ema(x, span=None, alpha=None):
+    return x.ewm(span=span, alpha=alpha, adjust=False).mean()
+
+def compute_indicators(df: pd.DataFrame):
+    """Indicator columns for every bar of an OHLCV frame (Wilder RSI, population-std Bollinger)"""
+    close = df['Close'].astype(float)
+    delta = close.diff()
+    avg_gain = _ema(delta.clip(lower=0).iloc[1:], alpha=1/RSI_PERIOD)
+    avg_loss = _ema((-delta).clip(lower=0).iloc[1:], alpha=1/RSI_PERIOD)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss > 0, 100 - 100 / (1 + avg_gain / avg_loss), 100.0)
+
+    ema_fast = _ema(close, span=EMA_FAST)
+    ema_slow = _ema(close, span=EMA_SLOW)
+    macd = ema_fast - ema_slow
+    signal = _ema(macd, span=MACD_SIGNAL)
+
+    mid = close.rolling(BB_PERIOD).mean()
+    std = close.rolling(BB_PERIOD).std(ddof=0)
+    upper, lower = mid + BB_STD * std, mid - BB_STD * std
+    width = (upper - lower).where(upper > lower)
+
+    out = pd.DataFrame(index=df.index)
+    out["rsi"] = pd.Series(rsi, index=avg_gain.index).reindex(df.index)
+    out["ema_fast"] = ema_fast
+    out["ema_slow"] = ema_slow
+    out["macd"] = macd
+    out["macd_signal"] = signal
+    out["macd_hist"] = macd - signal
+    out["bb_mid"] = mid
+    out["bb_upper"] = upper
+    out["bb_lower"] = lower
+    out["bb_pctb"] = (close - lower) / width
+    return out
+
+
+def indicator_score(snap):
+    """Blend one bar's indicators into a [-1, 1] signal (positive = bullish).
+
+    Trend (EMA spread, MACD histogram) is scaled by the Bollinger standard
+    deviation so it is comparable across prices; RSI and %b are read as
+    mean reversion (oversold bullish, overbought bearish).
+    """
+    if not snap or snap.get("bb_mid") is None:
+        return 0.0  # not enough bars yet
+    parts = []
+    std = (snap["bb_upper"] - snap["bb_mid"]) / BB_STD
+    if std > 0:
+        parts.append(math.tanh((snap["ema_fast"] - snap["ema_slow"]) / std))
+        parts.append(math.tanh(snap["macd_hist"] / std))
+    if snap.get("rsi") is not None:
+        parts.append(max(-1.0, min(1.0, (50 - snap["rsi"]) / 20)))
+    if snap.get("bb_pctb") is not None:
+        parts.append(max(-1.0, min(1.0, 1 - 2 * snap["bb_pctb"])))
+    return sum(parts) / len(parts) if parts else 0.0
+
+
+class IndicatorState:
+    """O(1)-per-bar indicator state for one series.
+
+    ``push`` commits a closed bar. ``peek`` evaluates a bar on top of the
+    committed state without changing it, for the still-forming last bar whose
+    close keeps being revised.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.prev = None
+        self.ema_fast = self.ema_slow = self.signal = None
+        self.avg_gain = self.avg_loss = None
+        self.window = deque(maxlen=BB_PERIOD)
+        self.last_ts = None
+
+    def _step(self, x):
+        """Next state values for close ``x``; returns (new_values, snapshot)"""
+        a_f, a_s, a_sig, a_rsi = 2/(EMA_FAST+1), 2/(EMA_SLOW+1), 2/(MACD_SIGNAL+1), 1/RSI_PERIOD
+        if self.n == 0:
+            ema_fast = ema_slow = x
+            avg_gain = avg_loss = None
+        else:
+            ema_fast = self.ema_fast + a_f * (x - self.ema_fast)
+            ema_slow = self.ema_slow + a_s * (x - self.ema_slow)
+            gain, loss = max(x - self.prev, 0.0), max(self.prev - x, 0.0)
+            if self.avg_gain is None:
+                avg_gain, avg_loss = gain, loss
+            else:
+                avg_gain = self.avg_gain + a_rsi * (gain - self.avg_gain)
+                avg_loss = self.avg_loss + a_rsi * (loss - self.avg_loss)
+        macd = ema_fast - ema_slow
+        signal = macd if self.signal is None else self.signal + a_sig * (macd - self.signal)
+
+        snap = {"close": x, "ema_fast": ema_fast, "ema_slow": ema_slow, "macd": macd,
+                "macd_signal": signal, "macd_hist": macd - signal,
+                "rsi": None, "bb_mid": None, "bb_upper": None, "bb_lower": None, "bb_pctb": None}
+        if avg_gain is not None:
+            snap["rsi"] = 100 - 100 / (1 + avg_gain / avg_loss) if avg_loss > 0 else 100.0
+        if self.n + 1 >= BB_PERIOD:
+            # Two passes over the last BB_PERIOD closes; running sum/sumsq would drift
+            win = list(self.window)[1 - BB_PERIOD:] + [x]
+            mid = math.fsum(win) / BB_PERIOD
+            std = math.sqrt(math.fsum((v - mid) ** 2 for v in win) / BB_PERIOD)
+            snap.update(bb_mid=mid, bb_upper=mid + BB_STD * std, bb_lower=mid - BB_STD * std,
+                        bb_pctb=(x - (mid - BB_STD * std)) / (2 * BB_STD * std) if std > 0 else None)
+        snap["score"] = indicator_score(snap)
+        return (ema_fast, ema_slow, signal, avg_gain, avg_loss), snap
+
+    def push(self, ts, x):
+        """Commit a closed bar"""
+        x = float(x)
+        (self.ema_fast, self.ema_slow, self.signal, self.avg_gain, self.avg_loss), snap = self._step(x)
+        self.window.append(x)
+        self.prev = x
+        self.n += 1
+        self.last_ts = ts
+        return snap
+
+    def peek(self, x):
+        """Indicators for a bar after the committed ones, without committing it"""
+        return self._step(float(x))[1]
+
+
+class IndicatorEngine:
+    """Streaming indicator state per (ticker, interval), fed with OHLCV frames.
+
+    ``update`` commits only the bars after the last committed timestamp and
+    evaluates the final (possibly still forming) bar with ``peek``. If the
+    committed timestamp has dropped out of the frame (gap or restart) the
+    state is rebuilt from the frame.
+    """
+
+    def __init__(self, max_states=5000):
+        self.max_states = max_states
+        self._states = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLocks()
+        self.stats = {"updates": 0, "bars": 0, "rebuilds": 0}
+
+    def update(self, ticker, interval, df):
+        """Fold new bars of ``df`` into the state; returns the latest snapshot"""
+        if df is None or df.empty:
+            return None
+        key = (ticker, interval)
+        close = df['Close'].astype(float).values
+        index = df.index
+        n = len(close)
+
+        with self._key_locks.hold(key):
+            with self._lock:
+                st = self._states.get(key)
+            start = 0
+            if st is not None and st.last_ts is not None:
+                pos = index.searchsorted(st.last_ts)
+                if pos < n and index[pos] == st.last_ts:
+                    start = pos + 1
+                else:
+                    st = None
+            if st is None:
+                st = IndicatorState()
+                with self._lock:
+                    self.stats["rebuilds"] += 1
+            if start >= n:
+                # Frame is older than the state (nothing after the committed bar)
+                return self.latest(ticker, interval)
+
+            # Everything but the last bar is closed; the last one may still change
+            for i in range(start, n - 1):
+                st.push(index[i], close[i])
+            snap = dict(st.peek(close[-1]), timestamp=str(index[-1]))
+
+            with self._lock:
+                self._states[key] = st
+                self._states.move_to_end(key)
+                self._latest[key] = snap
+                while len(self._states) > self.max_states:
+                    old, _ = self._states.popitem(last=False)
+                    self._latest.pop(old, None)
+                self.stats["updates"] += 1
+                self.stats["bars"] += int(n - 1 - start)
+            return snap
+
+    def on_bars(self, ticker, interval, df):
+        """OHLCV cache listener"""
+        try:
+            self.update(ticker, interval, df)
+        except Exception as e:
+            print(f"Indicator update error for {ticker} {interval}: {e}")
+
+    def latest(self, ticker, interval):
+        """Most recent snapshot for (ticker, interval), or None"""
+        with self._lock:
+            return self._latest.get((ticker, interval))
+
+
+# Shared engine, fed by the OHLCV cache
+indicator_engine = IndicatorEngine()
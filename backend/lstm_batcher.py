@@ -0,0 +1,99 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+
+class _Request:
+    __slots__ = ("forecaster", "window", "steps", "future")
+
+    def __init__(self, forecaster, window, steps):
+        self.forecaster = forecaster
+        self.window = window
+        self.steps = steps
+        self.future = Future()
+
+
+class LSTMBatcher:
+    """Micro-batching queue for LSTM inference.
+
+    Windows submitted from concurrent requests are collected until
+    ``max_batch`` are queued or ``max_wait_ms`` has passed since the first
+    one, then every group that shares a ``batch_key`` (default: the
+    forecaster itself) and step count is run as a single call on a
+    (n, window) array. Forecasters with ``forecast_group`` can batch rows
+    that use different weights of the same architecture.
+    """
+
+    def __init__(self, max_batch=64, max_wait_ms=5.0):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="lstm-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, forecaster, window, steps=1):
+        """Queue one scaled window; the Future resolves to an array of ``steps`` predictions"""
+        req = _Request(forecaster, np.asarray(window, dtype=np.float32), steps)
+        self._ensure_worker()
+        self._queue.put(req)
+        return req.future
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        groups = {}
+        for req in batch:
+            key = getattr(req.forecaster, "batch_key", id(req.forecaster))
+            groups.setdefault((key, req.steps), []).append(req)
+
+        for (_, steps), reqs in groups.items():
+            try:
+                x = np.stack([r.window for r in reqs])
+                head = reqs[0].forecaster
+                if hasattr(head, "forecast_group"):
+                    out = head.forecast_group([r.forecaster for r in reqs], x, steps)
+                else:
+                    out = head.forecast(x, steps)
+                for r, row in zip(reqs, out):
+                    r.future.set_result(row)
+            except Exception as e:
+                for r in reqs:
+                    r.future.set_exception(e)
+
+            with self._lock:
+                self.batches += 1
+                self.requests += len(reqs)
+                self.largest_batch = max(self.largest_batch, len(reqs))
+
+    def stats(self):
+        """Batch counters"""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "avg_batch": self.requests / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+            }
@@ -1,13 +1,19 @@
 import os
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
+from numpy.lib.stride_tricks import sliding_window_view
+from datetime import datetime
+from model_registry import ModelRegistry
+from lstm_numpy import save_lstm_artifact, load_lstm_artifact, numpy_artifact_path
+from lstm_batcher import LSTMBatcher
+from config import LSTM_REGISTRY_MAX_MB, LSTM_BATCH_MAX, LSTM_BATCH_WAIT_MS, LSTM_STREAM_MIN_BYTES
 
 def build_lstm(input_shape=(32,1), hidden=64, dropout=0.1):
     """Build LSTM model architecture"""
+    # TensorFlow is only imported for training and Keras parity checks; serving reads the NumPy artifact
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense, Dropout
+    
     model = Sequential()
     model.add(LSTM(hidden, input_shape=input_shape))
     model.add(Dropout(dropout))
@@ -16,64 +22,151 @@ def build_lstm(input_shape=(32,1), hidden=64, dropout=0.1):
     return model
 
 def create_windows(arr, window=32):
-    """Create sliding windows for time series"""
-    X, y = [], []
-    for i in range(len(arr)-window):
-        X.append(arr[i:i+window])
-        y.append(arr[i+window])
-    return np.array(X), np.array(y)
-
-def train_lstm(close_series, model_path, window=32, epochs=50, batch_size=64):
-    """Train LSTM model on close price series"""
+    """Create sliding windows for time series
+
+    X is a read-only strided view over ``arr`` (no copy); y is a slice of it.
+    """
+    arr = np.asarray(arr)
+    n = len(arr) - window
+    if n <= 0:
+        return np.empty((0, window), dtype=arr.dtype), np.empty((0,), dtype=arr.dtype)
+    X = sliding_window_view(arr, window)[:n]
+    y = arr[window:]
+    return X, y
+
+def make_window_dataset(arr, window=32, batch_size=64, start=0, end=None):
+    """Stream (window, 1) -> next value batches with tf.data, for series too large for RAM
+
+    Covers the samples whose target index is in [start + window, end).
+    """
+    import tensorflow as tf
+    
+    end = len(arr) if end is None else end
+    data = np.asarray(arr[start:end], dtype=np.float32).reshape(-1, 1)
+    return tf.keras.utils.timeseries_dataset_from_array(
+        data, data[window:, 0], sequence_length=window, batch_size=batch_size)
+
+def train_lstm(close_series, model_path, window=32, epochs=50, batch_size=64, stream=None, verbose=1):
+    """Train LSTM model on close price series
+
+    ``stream`` feeds windows through tf.data instead of materialising them;
+    by default it is used once the window tensor would exceed
+    LSTM_STREAM_MIN_BYTES.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+    from tensorflow.keras.callbacks import EarlyStopping
+    
     arr = close_series.astype(float).dropna().values.reshape(-1,1)
     scaler = MinMaxScaler()
-    arr_s = scaler.fit_transform(arr).flatten()
+    arr_s = scaler.fit_transform(arr).flatten().astype(np.float32)
     
-    X, y = create_windows(arr_s, window)
-    if X.size == 0:
+    samples = len(arr_s) - window
+    if samples <= 0:
         raise ValueError("Not enough data to train")
+    if stream is None:
+        stream = samples * window * arr_s.itemsize > LSTM_STREAM_MIN_BYTES
     
-    X = X.reshape((X.shape[0], X.shape[1], 1))
     model = build_lstm((window,1))
-    
     es = EarlyStopping(monitor='val_loss', patience=6, restore_best_weights=True)
-    model.fit(X, y, epochs=epochs, batch_size=batch_size, validation_split=0.1, callbacks=[es], verbose=1)
+    
+    if stream:
+        # Same split as validation_split=0.1: the last 10% of samples validate
+        split = samples - max(1, samples // 10)
+        train_ds = make_window_dataset(arr_s, window, batch_size, end=split + window)
+        val_ds = make_window_dataset(arr_s, window, batch_size, start=split)
+        history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=[es], verbose=verbose)
+    else:
+        X, y = create_windows(arr_s, window)
+        history = model.fit(X[..., None], y, epochs=epochs, batch_size=batch_size, validation_split=0.1,
+                            callbacks=[es], verbose=verbose)
     
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
     model.save(model_path)
-    np.save(model_path + ".scaler_mean.npy", scaler.mean_)
-    np.save(model_path + ".scaler_scale.npy", scaler.scale_)
+    val_loss = history.history.get('val_loss')
+    save_lstm_artifact(numpy_artifact_path(model_path), model, scaler.data_min_, scaler.scale_, metadata={
+        "trained_at": datetime.utcnow().isoformat(),
+        "samples": int(samples),
+        "epochs_run": len(history.history.get('loss', [])),
+        "val_loss": float(min(val_loss)) if val_loss else None,
+    })
     
     return model_path
 
+class KerasForecaster:
+    """Runs a Keras LSTM autoregressively for ``steps`` predictions in one graph call"""
+    
+    def __init__(self, model):
+        import tensorflow as tf
+        self._tf = tf
+        self.model = model
+        self.window = model.input_shape[1]
+        self._rollout = tf.function(
+            self._rollout_fn,
+            input_signature=[tf.TensorSpec([None, self.window, 1], tf.float32),
+                             tf.TensorSpec([], tf.int32)])
+    
+    def _rollout_fn(self, x, steps):
+        tf = self._tf
+        preds = tf.TensorArray(tf.float32, size=steps)
+        for i in tf.range(steps):
+            p = tf.cast(self.model(x, training=False), tf.float32)
+            preds = preds.write(i, p[:, 0])
+            # Slide the window: drop the oldest value, append the prediction
+            x = tf.concat([x[:, 1:, :], tf.expand_dims(p, 1)], axis=1)
+        return tf.transpose(preds.stack())
+    
+    def forecast(self, x, steps=1):
+        """Forecast ``steps`` values for each scaled window in ``x`` (n, window)"""
+        tf = self._tf
+        x = np.asarray(x, dtype=np.float32).reshape((-1, self.window, 1))
+        return self._rollout(tf.constant(x), tf.constant(steps, dtype=tf.int32)).numpy()
+
+# Legacy .h5 models already reported as having no NumPy artifact
+_unservable = set()
+
+def lstm_model_available(model_path):
+    """True if a serving artifact exists for ``model_path``.
+
+    Only NumPy artifacts are served. A legacy Keras .h5 without one is
+    skipped, with a warning the first time it is seen.
+    """
+    if os.path.exists(numpy_artifact_path(model_path)):
+        return True
+    if os.path.exists(model_path) and model_path not in _unservable:
+        _unservable.add(model_path)
+        print(f"⚠️ LSTM model {model_path} has no NumPy artifact and will not be served; "
+              f"retrain it to produce {numpy_artifact_path(model_path)}")
+    return False
+
+def _load_lstm(path):
+    """Load a forecaster and its scaler from a single artifact read"""
+    forecaster, scaler, _ = load_lstm_artifact(path)
+    return forecaster, scaler
+
+# Models stay resident across requests; reloaded when the artifact changes
+model_registry = ModelRegistry(_load_lstm, max_bytes=LSTM_REGISTRY_MAX_MB * 1024 * 1024)
+
+# Concurrent predictions on the same model architecture are run as one batched call
+lstm_batcher = LSTMBatcher(max_batch=LSTM_BATCH_MAX, max_wait_ms=LSTM_BATCH_WAIT_MS)
+
+def _scaled_window(scaler, recent_closes, window):
+    arr = np.array(recent_closes[-window:], dtype=float).reshape(-1,1)
+    if arr.shape[0] != window:
+        raise ValueError(f"need {window} closes, got {arr.shape[0]}")
+    return scaler.transform(arr).flatten()
+
 def predict_lstm(model_path, recent_closes, window=32, steps=1):
     """Make predictions using trained LSTM model"""
-    if not os.path.exists(model_path):
+    path = numpy_artifact_path(model_path)
+    if not os.path.exists(path):
         return []
     
     try:
-        mean = np.load(model_path + ".scaler_mean.npy")
-        scale = np.load(model_path + ".scaler_scale.npy")
-        scaler = MinMaxScaler()
-        scaler.mean_ = mean
-        scaler.scale_ = scale
-        
-        model = load_model(model_path)
-        arr = np.array(recent_closes[-window:]).reshape(-1,1)
-        arr_s = scaler.transform(arr).flatten()
-        
-        x = arr_s.reshape((1, window, 1))
-        preds = []
-        x_curr = x.copy()
-        
-        for _ in range(steps):
-            p = model.predict(x_curr, verbose=0)[0,0]
-            preds.append(p)
-            x_roll = np.roll(x_curr.flatten(), -1)
-            x_roll[-1] = p
-            x_curr = x_roll.reshape((1,window,1))
+        forecaster, scaler = model_registry.get(path)
+        arr_s = _scaled_window(scaler, recent_closes, window)
+        preds = lstm_batcher.submit(forecaster, arr_s, steps).result()
         
-        preds = np.array(preds).reshape(-1,1)
+        preds = np.asarray(preds, dtype=float).reshape(-1,1)
         preds_ori = scaler.inverse_transform(preds).flatten().tolist()
         
         return preds_ori
@@ -0,0 +1,143 @@
+import os
+import json
+import tempfile
+import numpy as np
+
+# Pure-NumPy inference for the single-layer LSTM + Dense model built by
+# lstm_model.build_lstm, so serving never has to import TensorFlow.
+
+
+# Bump when the artifact layout changes; loaders refuse other versions
+ARTIFACT_VERSION = 1
+
+
+def numpy_artifact_path(model_path):
+    """Path of the serving artifact next to a Keras model file"""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+class MinMaxParams:
+    """MinMaxScaler(feature_range=(0, 1)) transform from its fitted data_min_/scale_"""
+
+    def __init__(self, data_min, scale):
+        self.data_min = np.asarray(data_min, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.min_ = -self.data_min * self.scale
+
+    def transform(self, x):
+        return np.asarray(x, dtype=np.float64) * self.scale + self.min_
+
+    def inverse_transform(self, x):
+        return (np.asarray(x, dtype=np.float64) - self.min_) / self.scale
+
+
+def save_lstm_artifact(path, model, data_min, scale, metadata=None):
+    """Write weights, scaler and metadata of a trained Keras model to one .npz, atomically"""
+    lstm = next(l for l in model.layers if l.__class__.__name__ == "LSTM")
+    dense = [l for l in model.layers if l.__class__.__name__ == "Dense"][-1]
+    kernel, recurrent, bias = lstm.get_weights()
+    dense_w, dense_b = dense.get_weights()
+    window = int(model.input_shape[1])
+    meta = dict(metadata or {}, window=window, units=int(recurrent.shape[0]))
+
+    # Write next to the target and rename, so readers never see a partial file
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f,
+                     format_version=np.int32(ARTIFACT_VERSION),
+                     kernel=kernel.astype(np.float32),
+                     recurrent=recurrent.astype(np.float32),
+                     bias=bias.astype(np.float32),
+                     dense_w=dense_w.astype(np.float32),
+                     dense_b=dense_b.astype(np.float32),
+                     window=np.int32(window),
+                     data_min=np.asarray(data_min, dtype=np.float64).reshape(-1),
+                     scale=np.asarray(scale, dtype=np.float64).reshape(-1),
+                     metadata=np.array(json.dumps(meta)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def load_lstm_artifact(path):
+    """Read an artifact with one file open; returns (NumpyLSTM, MinMaxParams, metadata)"""
+    with np.load(path, allow_pickle=False) as z:
+        version = int(z["format_version"]) if "format_version" in z.files else 0
+        if version != ARTIFACT_VERSION:
+            raise ValueError(f"{path}: artifact version {version}, expected {ARTIFACT_VERSION}")
+        model = NumpyLSTM(z["kernel"], z["recurrent"], z["bias"], z["dense_w"], z["dense_b"], z["window"])
+        scaler = MinMaxParams(z["data_min"], z["scale"])
+        metadata = json.loads(str(z["metadata"]))
+    return model, scaler, metadata
+
+
+def read_lstm_metadata(path):
+    """Training metadata stored in an artifact"""
+    with np.load(path, allow_pickle=False) as z:
+        return json.loads(str(z["metadata"]))
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+class NumpyLSTM:
+    """Stateless LSTM(units) -> Dense(1) forward pass (Keras gate order i, f, c, o)"""
+
+    def __init__(self, kernel, recurrent, bias, dense_w, dense_b, window):
+        self.kernel = kernel          # (1, 4u)
+        self.recurrent = recurrent    # (u, 4u)
+        self.bias = bias              # (4u,)
+        self.dense_w = dense_w        # (u, 1)
+        self.dense_b = dense_b        # (1,)
+        self.window = int(window)
+        self.units = recurrent.shape[0]
+        # Models with the same shape can be evaluated together with stacked weights
+        self.batch_key = ("numpy", self.units, self.window)
+
+    def forecast(self, x, steps=1):
+        """Forecast ``steps`` values for each scaled window in ``x`` (n, window)"""
+        return self.forecast_group([self] * len(x), x, steps)
+
+    def forecast_group(self, models, x, steps=1):
+        """Forecast with a per-row model; rows may use different weights of the same shape"""
+        x = np.asarray(x, dtype=np.float32).reshape(-1, self.window)
+        if all(m is models[0] for m in models):
+            m = models[0]
+            W, U, b, Wd, bd = m.kernel[0], m.recurrent, m.bias, m.dense_w[:, 0], m.dense_b
+            stacked = False
+        else:
+            W = np.stack([m.kernel[0] for m in models])
+            U = np.stack([m.recurrent for m in models])
+            b = np.stack([m.bias for m in models])
+            Wd = np.stack([m.dense_w[:, 0] for m in models])
+            bd = np.stack([m.dense_b for m in models])
+            stacked = True
+
+        n, u = x.shape[0], self.units
+        preds = np.empty((n, steps), dtype=np.float32)
+        for s in range(steps):
+            h = np.zeros((n, u), dtype=np.float32)
+            c = np.zeros((n, u), dtype=np.float32)
+            for t in range(self.window):
+                rec = np.einsum("nh,nhk->nk", h, U) if stacked else h @ U
+                z = x[:, t:t+1] * W + rec + b
+                i = _sigmoid(z[:, :u])
+                f = _sigmoid(z[:, u:2*u])
+                g = np.tanh(z[:, 2*u:3*u])
+                o = _sigmoid(z[:, 3*u:])
+                c = f * c + i * g
+                h = o * np.tanh(c)
+            p = (h * Wd).sum(axis=1) + (bd[:, 0] if stacked else bd[0])
+            preds[:, s] = p
+            # Slide the window: drop the oldest value, append the prediction
+            x = np.concatenate([x[:, 1:], p[:, None]], axis=1)
+        return preds
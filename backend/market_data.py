@@ -0,0 +1,157 @@
+import os
+import time
+from abc import ABC, abstractmethod
+import pandas as pd
+from ohlcv_cache import period_days, trim_to_period
+from config import MARKET_DATA_PROVIDER, REPLAY_DATA_DIR, REPLAY_LATENCY_MS, REPLAY_TZ
+
+OHLCV_COLUMNS = ['Open','High','Low','Close','Volume']
+
+
+def split_frame(df, tickers):
+    """Split a (possibly MultiIndex) yfinance frame into per-ticker OHLCV frames"""
+    out = {}
+    for ticker in tickers:
+        sub = pd.DataFrame()
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            if isinstance(df.columns, pd.MultiIndex):
+                # group_by="ticker" puts the symbol on level 0, the default on level 1
+                if ticker in df.columns.get_level_values(0):
+                    sub = df[ticker]
+                elif ticker in df.columns.get_level_values(1):
+                    sub = df.xs(ticker, axis=1, level=1)
+            elif len(tickers) == 1:
+                sub = df
+        if not sub.empty and set(OHLCV_COLUMNS).issubset(sub.columns):
+            out[ticker] = sub[OHLCV_COLUMNS].dropna()
+        else:
+            out[ticker] = pd.DataFrame()
+    return out
+
+
+class MarketDataProvider(ABC):
+    """Source of OHLCV bars and news items.
+
+    ``download`` returns ``{ticker: DataFrame}`` with Open/High/Low/Close/Volume
+    columns (empty frame when there is no data) and raises on transport
+    errors. ``news`` returns a list of yfinance-style news dicts.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def download(self, tickers, interval, period=None, start=None):
+        """``{ticker: DataFrame}`` of OHLCV bars"""
+
+    @abstractmethod
+    def news(self, ticker):
+        """List of yfinance-style news dicts"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance"""
+
+    name = "yfinance"
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+
+    def download(self, tickers, interval, period=None, start=None):
+        tickers = list(tickers)
+        if start is not None:
+            df = self._yf.download(tickers=tickers, start=start, interval=interval,
+                                   group_by="ticker", threads=True, progress=False)
+        else:
+            df = self._yf.download(tickers=tickers, period=period, interval=interval,
+                                   group_by="ticker", threads=True, progress=False)
+        return split_frame(df, tickers)
+
+    def news(self, ticker):
+        return self._yf.Ticker(ticker).news or []
+
+
+class ReplayProvider(MarketDataProvider):
+    """Offline provider serving recorded data from ``root``.
+
+    OHLCV is read from ``{TICKER}_{interval}.parquet`` (or ``.csv`` with the
+    timestamp as the first column) and news from ``{TICKER}_news.csv`` with
+    ``title``/``summary`` columns (optional ``id``/``url``). Every call sleeps
+    ``latency_ms`` to simulate the network. ``period`` requests are answered
+    relative to the last recorded bar, so replays are deterministic. Bar
+    times are served in ``tz``.
+    """
+
+    name = "replay"
+
+    def __init__(self, root=REPLAY_DATA_DIR, latency_ms=REPLAY_LATENCY_MS, tz=REPLAY_TZ):
+        self.root = root
+        self.tz = tz
+        self.latency = latency_ms / 1000.0
+        self._frames = {}
+
+    def _sleep(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _load(self, ticker, interval):
+        key = (ticker, interval)
+        if key not in self._frames:
+            base = os.path.join(self.root, f"{ticker}_{interval}")
+            if os.path.exists(base + ".parquet"):
+                df = pd.read_parquet(base + ".parquet")
+            elif os.path.exists(base + ".csv"):
+                df = pd.read_csv(base + ".csv", index_col=0, parse_dates=True)
+            else:
+                df = pd.DataFrame()
+            if not df.empty:
+                df.index = self._parse_index(df.index)
+            self._frames[key] = df
+        return self._frames[key]
+
+    def _parse_index(self, idx):
+        # A CSV spanning a DST change has mixed UTC offsets, which read_csv leaves as strings
+        if not isinstance(idx, pd.DatetimeIndex):
+            idx = pd.to_datetime(idx, utc=True)
+        if idx.tz is not None and self.tz:
+            idx = idx.tz_convert(self.tz)
+        return idx
+
+    def download(self, tickers, interval, period=None, start=None):
+        self._sleep()
+        out = {}
+        for ticker in tickers:
+            df = self._load(ticker, interval)
+            if not df.empty:
+                if start is not None:
+                    df = df[df.index >= start]
+                elif period and period_days(period) != float("inf"):
+                    df = trim_to_period(df, period)
+            out[ticker] = df[OHLCV_COLUMNS].dropna() if not df.empty else pd.DataFrame()
+        return out
+
+    def news(self, ticker):
+        self._sleep()
+        path = os.path.join(self.root, f"{ticker}_news.csv")
+        if not os.path.exists(path):
+            return []
+        df = pd.read_csv(path).fillna("")
+        return df.to_dict("records")
+
+
+_provider = None
+
+def get_provider():
+    """Return the process-wide market data provider (MARKET_DATA_PROVIDER)"""
+    global _provider
+    if _provider is None:
+        if MARKET_DATA_PROVIDER == "replay":
+            _provider = ReplayProvider()
+        else:
+            _provider = YFinanceProvider()
+    return _provider
+
+def set_provider(provider):
+    """Swap the provider, e.g. to a ReplayProvider for benchmarks"""
+    global _provider
+    _provider = provider
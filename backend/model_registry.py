@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from executors import KeyedLocks
+
+
+class _Entry:
+    __slots__ = ("obj", "mtime", "nbytes")
+
+    def __init__(self, obj, mtime, nbytes):
+        self.obj = obj
+        self.mtime = mtime
+        self.nbytes = nbytes
+
+
+class ModelRegistry:
+    """In-process registry of loaded models keyed by file path.
+
+    Each file is loaded once with ``loader(path)`` and kept resident. The
+    file's mtime is checked on every lookup, so retraining a model in place
+    triggers a reload. Resident size is estimated from the file size and the
+    least-recently-used models are evicted when ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, loader, max_bytes=512 * 1024 * 1024):
+        self._loader = loader
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLocks()
+        self._bytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def _lookup(self, path, mtime):
+        with self._lock:
+            entry = self._data.get(path)
+            if entry is not None and entry.mtime == mtime:
+                self._data.move_to_end(path)
+                self.hits += 1
+                return entry
+            return None
+
+    def get(self, path):
+        """Return the loaded model for ``path``, loading or reloading it if needed"""
+        mtime = os.path.getmtime(path)
+        entry = self._lookup(path, mtime)
+        if entry is not None:
+            return entry.obj
+
+        # Load each file once even if many requests miss at the same time
+        with self._key_locks.hold(path):
+            entry = self._lookup(path, mtime)
+            if entry is not None:
+                return entry.obj
+
+            t0 = time.perf_counter()
+            obj = self._loader(path)
+            elapsed = time.perf_counter() - t0
+
+            with self._lock:
+                old = self._data.pop(path, None)
+                if old is not None:
+                    self._bytes -= old.nbytes
+                    self.reloads += 1
+                self.loads += 1
+                self.load_seconds += elapsed
+
+                entry = _Entry(obj, mtime, os.path.getsize(path))
+                self._data[path] = entry
+                self._bytes += entry.nbytes
+                while self._bytes > self.max_bytes and len(self._data) > 1:
+                    _, evicted = self._data.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+                    self.evictions += 1
+            return obj
+
+    def invalidate(self, path=None):
+        """Drop one resident model, or all of them"""
+        with self._lock:
+            for key in [k for k in self._data if path is None or k == path]:
+                self._bytes -= self._data.pop(key).nbytes
+
+    def stats(self):
+        """Load/hit counters and resident size"""
+        with self._lock:
+            total = self.hits + self.loads
+            return {
+                "resident": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "avg_load_ms": self.load_seconds / self.loads * 1000 if self.loads else 0.0,
+            }
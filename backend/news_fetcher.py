@@ -0,0 +1,140 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from market_data import get_provider
+from config import NEWS_TTL, NEWS_MAX_STORIES
+from executors import KeyedLocks
+
+
+class NewsItem:
+    """One news story; ``is_stub`` marks placeholder text that must not be scored"""
+
+    __slots__ = ("id", "title", "summary", "url", "published", "is_stub")
+
+    def __init__(self, id, title, summary="", url="", published=None, is_stub=False):
+        self.id = id
+        self.title = title
+        self.summary = summary
+        self.url = url
+        self.published = published
+        self.is_stub = is_stub
+
+    @property
+    def text(self):
+        """Headline text as scored by sentiment"""
+        return f"{self.title}. {self.summary}" if self.summary else self.title
+
+    def to_dict(self):
+        return {"id": self.id, "title": self.title, "summary": self.summary, "url": self.url,
+                "published": self.published, "is_stub": self.is_stub}
+
+
+def parse_news_item(raw):
+    """NewsItem from an old-style flat or new-style ``content`` yfinance dict; None without a title"""
+    content = raw.get('content') or raw
+    title = (content.get('title') or '').strip()
+    if not title:
+        return None
+    url = content.get('canonicalUrl') or content.get('clickThroughUrl') or content.get('link') or raw.get('url') or ''
+    if isinstance(url, dict):
+        url = url.get('url', '')
+    published = content.get('pubDate') or content.get('providerPublishTime')
+    story_id = raw.get('id') or raw.get('uuid') or content.get('id') or url or title
+    return NewsItem(str(story_id), title, (content.get('summary') or '').strip(), url,
+                    str(published) if published else None)
+
+
+def stub_item(ticker):
+    """Placeholder shown when a ticker has no news; never scored"""
+    return NewsItem(f"stub:{ticker}", f"{ticker} shows market activity with recent trading patterns.",
+                    is_stub=True)
+
+
+class NewsFetcher:
+    """Per-ticker news with a TTL, deduplicated across tickers.
+
+    Each ticker maps to a list of story keys (id, else URL); the stories
+    themselves are stored once, so a piece syndicated to several tickers
+    is parsed and held once. A refresh that returns the same stories only
+    renews the timestamp. If a refresh fails, the previous list is kept.
+    """
+
+    def __init__(self, ttl=NEWS_TTL, max_stories=NEWS_MAX_STORIES, workers=8):
+        self.ttl = ttl
+        self.max_stories = max_stories
+        self.workers = workers
+        self._tickers = {}
+        self._stories = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLocks()
+        self.stats = {"hits": 0, "fetches": 0, "unchanged": 0, "new_stories": 0, "errors": 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _items(self, keys, limit):
+        with self._lock:
+            return [self._stories[k] for k in keys[:limit] if k in self._stories]
+
+    def get(self, ticker, limit=5):
+        """Up to ``limit`` stories for ``ticker``, or a single stub item when there are none"""
+        ticker = ticker.upper()
+        with self._key_locks.hold(ticker):
+            entry = self._tickers.get(ticker)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._count("hits")
+            else:
+                entry = self._refresh(ticker, entry)
+        items = self._items(entry[1], limit) if entry else []
+        return items or [stub_item(ticker)]
+
+    def _refresh(self, ticker, entry):
+        try:
+            raw = get_provider().news(ticker) or []
+        except Exception as e:
+            print(f"Error fetching news for {ticker}: {e}")
+            self._count("errors")
+            return entry
+        self._count("fetches")
+
+        keys, new = [], 0
+        with self._lock:
+            for r in raw:
+                item = parse_news_item(r)
+                if item is None:
+                    continue
+                key = item.id or item.url
+                if key in keys:
+                    continue
+                keys.append(key)
+                if key in self._stories:
+                    self._stories.move_to_end(key)
+                else:
+                    self._stories[key] = item
+                    new += 1
+            while len(self._stories) > self.max_stories:
+                self._stories.popitem(last=False)
+            self.stats["new_stories"] += new
+            if entry is not None and entry[1] == keys:
+                self.stats["unchanged"] += 1
+            entry = (time.monotonic(), keys)
+            self._tickers[ticker] = entry
+        return entry
+
+    def get_many(self, tickers, limit=5):
+        """News for a watchlist, fetched concurrently: {ticker: [NewsItem, ...]}"""
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(tickers)))) as pool:
+            results = list(pool.map(lambda t: self.get(t, limit), tickers))
+        return dict(zip(tickers, results))
+
+
+def scorable_headlines(items):
+    """Texts to score: real stories only, stubs excluded"""
+    return [i.text for i in items if not i.is_stub]
+
+
+# Shared fetcher used by the analysis engine
+news_fetcher = NewsFetcher()
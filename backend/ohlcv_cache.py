@@ -0,0 +1,222 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+import pandas as pd
+from executors import KeyedLocks
+
+# Seconds a cached frame is served before it is refreshed, sized to the bar length
+INTERVAL_TTL = {"1m": 30, "2m": 60, "5m": 120, "15m": 240, "30m": 480,
+                "60m": 900, "1h": 900, "90m": 1200, "1d": 3600}
+DEFAULT_TTL = 60
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+
+
+def period_days(period):
+    """Approximate length of a yfinance period string ("2d", "1mo", "max") in days"""
+    if period in ("max", "ytd"):
+        return float("inf") if period == "max" else 366
+    m = _PERIOD_RE.match(period or "")
+    if not m:
+        return 0
+    return int(m.group(1)) * _PERIOD_DAYS[m.group(2)]
+
+
+def trim_to_period(df, period):
+    """Rows of ``df`` inside ``period`` counted back from its last bar.
+
+    "Nd" keeps the last N trading dates, as yfinance does; wk/mo/y keep a
+    calendar span. Unknown periods and "max" return ``df`` unchanged.
+    """
+    if df is None or df.empty:
+        return df
+    if period == "ytd":
+        return df[df.index >= df.index[-1].normalize().replace(month=1, day=1)]
+    m = _PERIOD_RE.match(period or "")
+    if not m:
+        return df
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        dates = df.index.normalize()
+        return df[dates >= dates.unique()[-n:][0]]
+    offset = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+    return df[df.index > df.index[-1] - offset]
+
+
+class _Entry:
+    __slots__ = ("df", "period", "fetched_at", "max_rows", "nbytes")
+
+    def __init__(self, df, period, fetched_at):
+        self.df = df
+        self.period = period
+        self.fetched_at = fetched_at
+        self.max_rows = len(df)
+        self.nbytes = int(df.memory_usage(deep=True).sum()) if not df.empty else 0
+
+
+class OHLCVCache:
+    """Process-wide OHLCV cache keyed by (ticker, interval).
+
+    Entries expire after a TTL sized to the bar length. A stale entry is
+    refreshed incrementally: only bars from the last cached timestamp on are
+    downloaded and appended, and the frame is trimmed back to the row count of
+    the original download so it stays a rolling window. Total memory is capped
+    and least-recently-used entries are evicted first.
+
+    ``downloader(ticker, interval, period=None, start=None)`` must return a
+    DataFrame (possibly empty) or None on error. Batched callers can instead
+    download themselves and feed results in through ``put``/``append``.
+    Returned frames are shared between callers and must be treated as
+    read-only. An entry fetched for a longer period also serves shorter
+    ones; reads are trimmed to the requested period.
+    """
+
+    def __init__(self, downloader, max_bytes=256 * 1024 * 1024, ttl=None):
+        self._download = downloader
+        self.max_bytes = max_bytes
+        self.ttl = dict(INTERVAL_TTL, **(ttl or {}))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLocks()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self._listeners = []
+
+    def subscribe(self, fn):
+        """Call ``fn(ticker, interval, df)`` whenever a frame is stored or extended"""
+        self._listeners.append(fn)
+
+    def _notify(self, ticker, interval, df):
+        for fn in self._listeners:
+            fn(ticker, interval, df)
+
+    def _ttl_for(self, interval):
+        return self.ttl.get(interval, DEFAULT_TTL)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def _fresh(self, entry, interval, period):
+        return (time.monotonic() - entry.fetched_at < self._ttl_for(interval)
+                and period_days(entry.period) >= period_days(period))
+
+    def cached(self, ticker, interval, period="2d"):
+        """Return the cached frame if it is fresh and covers ``period``, else None"""
+        entry = self._lookup((ticker, interval))
+        if entry is None or not self._fresh(entry, interval, period):
+            return None
+        with self._lock:
+            self.hits += 1
+        return self._window(entry, period)
+
+    @staticmethod
+    def _window(entry, period):
+        if period_days(entry.period) > period_days(period):
+            return trim_to_period(entry.df, period)
+        return entry.df
+
+    def last_timestamp(self, ticker, interval, period="2d"):
+        """Last cached bar time if the entry can be refreshed incrementally, else None"""
+        entry = self._lookup((ticker, interval))
+        if entry is None or entry.df.empty or period_days(entry.period) < period_days(period):
+            return None
+        return entry.df.index[-1]
+
+    def get(self, ticker, interval, period="2d"):
+        """Return the OHLCV frame for (ticker, interval), downloading only what is missing"""
+        df = self.cached(ticker, interval, period)
+        if df is not None:
+            return df
+
+        # One refresh per key at a time; concurrent callers wait and then hit
+        with self._key_locks.hold((ticker, interval)):
+            df = self.cached(ticker, interval, period)
+            if df is not None:
+                return df
+
+            last_ts = self.last_timestamp(ticker, interval, period)
+            if last_ts is not None:
+                return self.append(ticker, interval, self._download(ticker, interval, start=last_ts), period)
+            return self.put(ticker, interval, period, self._download(ticker, interval, period=period))
+
+    def put(self, ticker, interval, period, df):
+        """Store a full download; a None (failed) download keeps whatever is cached"""
+        key = (ticker, interval)
+        with self._lock:
+            self.misses += 1
+        if df is None:
+            entry = self._lookup(key)
+            return entry.df if entry is not None else pd.DataFrame()
+        self._store(key, _Entry(df, period, time.monotonic()))
+        self._notify(ticker, interval, df)
+        return df
+
+    def append(self, ticker, interval, new, period=None):
+        """Append bars downloaded from the last cached timestamp on; returns the frame
+        trimmed to ``period`` (default: the entry's own)"""
+        key = (ticker, interval)
+        with self._lock:
+            self.refreshes += 1
+        entry = self._lookup(key)
+        if entry is None:
+            return new if new is not None else pd.DataFrame()
+        if new is None:
+            # Download failed: keep serving the stale frame rather than nothing
+            return self._window(entry, period or entry.period)
+
+        df = entry.df
+        if not new.empty:
+            # The last cached bar may have been partial, so new rows win on overlap
+            df = pd.concat([df[df.index < new.index[0]], new])
+            df = df[~df.index.duplicated(keep="last")]
+            if len(df) > entry.max_rows:
+                df = df.iloc[-entry.max_rows:]
+
+        refreshed = _Entry(df, entry.period, time.monotonic())
+        refreshed.max_rows = entry.max_rows
+        self._store(key, refreshed)
+        if new is not None and not new.empty:
+            self._notify(ticker, interval, df)
+        return self._window(refreshed, period or entry.period)
+
+    def _store(self, key, entry):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._data[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def invalidate(self, ticker=None):
+        """Drop cached frames for one ticker, or everything"""
+        with self._lock:
+            for key in [k for k in self._data if ticker is None or k[0] == ticker]:
+                self._bytes -= self._data.pop(key).nbytes
+
+    def stats(self):
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            total = self.hits + self.misses + self.refreshes
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
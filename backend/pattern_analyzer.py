@@ -42,26 +42,105 @@ def morning_star(prev2, prev1, curr):
            (curr['Close'] > curr['Open']) and \
            (curr['Close'] > (prev2['Open'] + prev2['Close'])/2)
 
+# Priority order used by detect_patterns when several patterns match one candle
+PATTERNS = ["Bullish Engulfing", "Bearish Engulfing", "Doji", "Hammer", "Shooting Star", "Morning Star"]
+
+# Expected direction of the next move, for backtesting hit rates (0 = no direction)
+PATTERN_DIRECTION = {"Bullish Engulfing": 1, "Bearish Engulfing": -1, "Doji": 0,
+                     "Hammer": 1, "Shooting Star": -1, "Morning Star": 1}
+
+def _shift(a, n):
+    """a shifted forward by n rows, padded with NaN"""
+    out = np.full_like(a, np.nan)
+    out[n:] = a[:-n]
+    return out
+
+def pattern_matrix(o, h, l, c):
+    """Boolean (n, len(PATTERNS)) matrix: every pattern evaluated on every candle at once"""
+    o, h, l, c = (np.asarray(x, dtype=float) for x in (o, h, l, c))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        body = np.abs(c - o)
+        rng = h - l
+        rng = np.where(rng > 0, rng, 1e-9)
+        lower = np.minimum(o, c) - l
+        upper = h - np.maximum(o, c)
+        doji = body / rng < 0.1
+        bull, bear = c > o, c < o
+
+        po, pc = _shift(o, 1), _shift(c, 1)
+        p2o, p2c = _shift(o, 2), _shift(c, 2)
+        prev_doji = np.zeros_like(doji)
+        prev_doji[1:] = doji[:-1]
+
+        m = np.empty((len(c), len(PATTERNS)), dtype=bool)
+        m[:, 0] = (pc < po) & bull & (c > po) & (o < pc)
+        m[:, 1] = (pc > po) & bear & (o > pc) & (c < po)
+        m[:, 2] = doji
+        m[:, 3] = (lower > 2 * body) & (upper < body)
+        m[:, 4] = (upper > 2 * body) & (lower < body)
+        m[:, 5] = (p2c < p2o) & prev_doji & bull & (c > (p2o + p2c) / 2)
+    return m
+
+def _matrix(df):
+    return pattern_matrix(df['Open'].values, df['High'].values, df['Low'].values, df['Close'].values)
+
+def pattern_columns(df: pd.DataFrame):
+    """One boolean column per pattern over the whole frame"""
+    return pd.DataFrame(_matrix(df), index=df.index, columns=PATTERNS)
+
+def find_patterns(df: pd.DataFrame):
+    """Every pattern match in the frame as rows of (timestamp, pattern, close)"""
+    if df is None or df.shape[0] < 2:
+        return pd.DataFrame(columns=["timestamp", "pattern", "close"])
+    m = _matrix(df)
+    m[0] = False  # the candle checks need at least one previous candle
+    rows, cols = np.nonzero(m)
+    return pd.DataFrame({
+        "timestamp": df.index[rows],
+        "pattern": np.asarray(PATTERNS, dtype=object)[cols],
+        "close": df['Close'].values[rows].astype(float),
+    })
+
+def pattern_hit_rates(df: pd.DataFrame, horizon=1):
+    """Backtest how often each pattern was followed by a move in its expected direction.
+
+    Returns {pattern: {"count", "hit_rate", "avg_return"}}; avg_return is the mean
+    close-to-close return ``horizon`` bars after the pattern candle.
+    """
+    close = df['Close'].values.astype(float)
+    m = _matrix(df)
+    m[0] = False
+    fwd = np.full(len(close), np.nan)
+    if len(close) > horizon:
+        fwd[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    valid = ~np.isnan(fwd)
+
+    out = {}
+    for j, name in enumerate(PATTERNS):
+        sel = m[:, j] & valid
+        n = int(sel.sum())
+        direction = PATTERN_DIRECTION[name]
+        hit_rate = float((np.sign(fwd[sel]) == direction).mean()) if n and direction else None
+        out[name] = {"count": n, "hit_rate": hit_rate,
+                     "avg_return": float(fwd[sel].mean()) if n else None}
+    return out
+
+def scan_patterns(frames, lookback=1):
+    """Patterns on the last ``lookback`` candles of many frames: {ticker: [(timestamp, pattern), ...]}"""
+    out = {}
+    for ticker, df in frames.items():
+        if df is None or df.shape[0] < 2:
+            out[ticker] = []
+            continue
+        hits = find_patterns(df.iloc[-(lookback + 2):])
+        hits = hits[hits["timestamp"].isin(df.index[-lookback:])]
+        out[ticker] = list(zip(hits["timestamp"], hits["pattern"]))
+    return out
+
 def detect_patterns(df: pd.DataFrame):
     """Check last 3 candles and return best matching pattern"""
     if df is None or df.shape[0] < 2:
         return None
-    
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
-    prev2 = df.iloc[-3] if df.shape[0] >= 3 else None
-
-    if bullish_engulfing(prev, last):
-        return "Bullish Engulfing"
-    if bearish_engulfing(prev, last):
-        return "Bearish Engulfing"
-    if is_doji(last):
-        return "Doji"
-    if hammer(last):
-        return "Hammer"
-    if shooting_star(last):
-        return "Shooting Star"
-    if prev2 is not None and morning_star(prev2, prev, last):
-        return "Morning Star"
-    
-    return None
+
+    hits = np.flatnonzero(_matrix(df.iloc[-3:])[-1])
+    return PATTERNS[hits[0]] if len(hits) else None
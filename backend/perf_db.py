@@ -1,15 +1,54 @@
-import sqlite3
-from datetime import datetime
-import os
-from config import PERF_DB_PATH
+import time
+from datetime import datetime, timezone
+from db import get_db
+from error_stats import EMPTY, tracked_bases, parse_basis, observe, decay_add, window_add
 
-def init_db():
-    """Initialize MCP performance database"""
-    os.makedirs(os.path.dirname(PERF_DB_PATH) if os.path.dirname(PERF_DB_PATH) else '.', exist_ok=True)
-    con = sqlite3.connect(PERF_DB_PATH)
-    cur = con.cursor()
-    
-    cur.execute("""
+# Reads use the calling thread's persistent connection; writes are queued to
+# the database's writer thread (see db.Database) and return a Future.
+
+# Called with updated model_stats rows after each resolution commits
+_stats_listeners = []
+
+def add_stats_listener(fn):
+    """Register ``fn(rows)``; rows are (ticker, timeframe, model, basis, mae, mape, hit_rate, n)
+    with basis "lifetime" for model_stats and the error_stats bases otherwise.
+    Returns ``fn`` as the handle for ``remove_stats_listener``."""
+    _stats_listeners.append(fn)
+    return fn
+
+def remove_stats_listener(fn):
+    """Stop calling a listener added with ``add_stats_listener``"""
+    try:
+        _stats_listeners.remove(fn)
+    except ValueError:
+        pass
+
+def _notify_stats(fut):
+    if fut.exception() is not None:
+        return
+    rows = fut.result() or []
+    for fn in list(_stats_listeners):
+        try:
+            fn(rows)
+        except Exception as e:
+            print(f"Stats listener error: {e}")
+
+# Lifetime and streaming stats in one shape; decayed means are sum / weight
+_STATS_ROWS = """
+SELECT ticker, timeframe, model, 'lifetime', mean_abs_error, NULL, NULL, count FROM model_stats {where}
+UNION ALL
+SELECT ticker, timeframe, model, basis, abs_sum / weight, pct_sum / weight,
+       hit_sum / NULLIF(hit_weight, 0), weight
+FROM error_stats {where} {and_} weight > 0"""
+
+def _changed_stats(con):
+    """Stats rows for the series in the current _batch"""
+    where = """WHERE (ticker, timeframe, model) IN
+        (SELECT DISTINCT p.ticker, p.timeframe, p.model FROM predictions p JOIN _batch b ON p.id = b.id)"""
+    return con.execute(_STATS_ROWS.format(where=where, and_="AND")).fetchall()
+
+def _m1_base_tables(con):
+    con.execute("""
     CREATE TABLE IF NOT EXISTS predictions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         ticker TEXT,
@@ -22,8 +61,8 @@ def init_db():
         error REAL,
         resolved INTEGER DEFAULT 0
     )""")
-    
-    cur.execute("""
+
+    con.execute("""
     CREATE TABLE IF NOT EXISTS model_stats (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         ticker TEXT,
@@ -33,84 +72,266 @@ def init_db():
         count INTEGER,
         last_updated TEXT
     )""")
-    
-    con.commit()
-    con.close()
-
-def store_prediction(ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price):
-    """Store a prediction in the database"""
-    con = sqlite3.connect(PERF_DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
-    INSERT INTO predictions (ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price)
-    VALUES (?, ?, ?, ?, ?, ?)
-    """, (ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price))
-    con.commit()
-    con.close()
 
-def resolve_prediction(pred_id, actual_price):
-    """Resolve a prediction by comparing with actual price"""
-    con = sqlite3.connect(PERF_DB_PATH)
-    cur = con.cursor()
-    
-    cur.execute("SELECT predicted_price, ticker, timeframe, model FROM predictions WHERE id=?", (pred_id,))
-    row = cur.fetchone()
-    if not row:
-        con.close()
-        return
-    
-    predicted_price, ticker, timeframe, model = row
-    error = abs(actual_price - predicted_price)
-    
-    cur.execute("UPDATE predictions SET actual_price=?, error=?, resolved=1 WHERE id=?", 
-                (actual_price, error, pred_id))
-    
-    cur.execute("SELECT mean_abs_error, count FROM model_stats WHERE ticker=? AND timeframe=? AND model=?", 
-                (ticker, timeframe, model))
-    r = cur.fetchone()
-    
-    if r:
-        mean_abs_error, count = r
-        new_count = count + 1
-        new_mean = (mean_abs_error * count + error)/new_count
-        cur.execute("UPDATE model_stats SET mean_abs_error=?, count=?, last_updated=? WHERE ticker=? AND timeframe=? AND model=?",
-                    (new_mean, new_count, datetime.utcnow().isoformat(), ticker, timeframe, model))
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS arima_orders (
+        ticker TEXT,
+        timeframe TEXT,
+        p INTEGER,
+        d INTEGER,
+        q INTEGER,
+        criterion TEXT,
+        score REAL,
+        orders_fitted INTEGER,
+        selected_at TEXT,
+        expires_at REAL,
+        PRIMARY KEY (ticker, timeframe)
+    )""")
+
+def _m2_indexes_and_unique_stats(con):
+    # Due-set scans touch only unresolved rows, oldest first
+    con.execute("CREATE INDEX IF NOT EXISTS idx_predictions_due ON predictions (resolved, predicted_at)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_predictions_series ON predictions (ticker, timeframe, model)")
+
+    # Merge duplicate model_stats rows left by the old read-then-insert, then key the table
+    con.execute("""
+    CREATE TEMP TABLE _stats AS
+    SELECT ticker, timeframe, model,
+           SUM(mean_abs_error * count) / NULLIF(SUM(count), 0) AS mean_abs_error,
+           SUM(count) AS count, MAX(last_updated) AS last_updated
+    FROM model_stats GROUP BY ticker, timeframe, model""")
+    con.execute("DELETE FROM model_stats")
+    con.execute("""
+    INSERT INTO model_stats (ticker, timeframe, model, mean_abs_error, count, last_updated)
+    SELECT ticker, timeframe, model, mean_abs_error, count, last_updated FROM _stats""")
+    con.execute("DROP TABLE _stats")
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_model_stats ON model_stats (ticker, timeframe, model)")
+
+def _m3_error_stats(con):
+    # Last price when the forecast was made, for the directional hit rate
+    con.execute("ALTER TABLE predictions ADD COLUMN base_price REAL")
+
+    # Decayed ("hl<hours>") and rolling-window ("w<size>") sums per series
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS error_stats (
+        ticker TEXT,
+        timeframe TEXT,
+        model TEXT,
+        basis TEXT,
+        weight REAL,
+        abs_sum REAL,
+        pct_sum REAL,
+        hit_weight REAL,
+        hit_sum REAL,
+        newest_ts REAL,
+        seq INTEGER,
+        PRIMARY KEY (ticker, timeframe, model, basis)
+    )""")
+
+    # Ring buffer behind each window: slot = seq % size
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS error_ring (
+        ticker TEXT,
+        timeframe TEXT,
+        model TEXT,
+        basis TEXT,
+        slot INTEGER,
+        abs_err REAL,
+        pct_err REAL,
+        hit INTEGER,
+        PRIMARY KEY (ticker, timeframe, model, basis, slot)
+    )""")
+
+# (version, migration); applied in order, each in its own transaction, tracked in PRAGMA user_version
+MIGRATIONS = [
+    (1, _m1_base_tables),
+    (2, _m2_indexes_and_unique_stats),
+    (3, _m3_error_stats),
+]
+
+def migrate(db=None):
+    """Apply pending migrations; returns the schema version"""
+    db = db or get_db()
+    con = db.connection()
+    for version, fn in MIGRATIONS:
+        with db.transaction(con):
+            # Re-read inside the write lock so concurrent starters don't both migrate
+            if con.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            fn(con)
+            con.execute(f"PRAGMA user_version={version}")
+            print(f"perf DB migrated to version {version}")
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+def init_db():
+    """Initialize MCP performance database"""
+    return migrate()
+
+# Adds a batch of errors to the running MAE in one statement
+_UPSERT_STATS = """
+ON CONFLICT (ticker, timeframe, model) DO UPDATE SET
+    mean_abs_error = (model_stats.mean_abs_error * model_stats.count + excluded.mean_abs_error * excluded.count)
+                     / (model_stats.count + excluded.count),
+    count = model_stats.count + excluded.count,
+    last_updated = excluded.last_updated"""
+
+def _insert_prediction(con, ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price, base_price):
+    con.execute("""
+    INSERT INTO predictions (ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price, base_price)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price, base_price))
+
+def store_prediction(ticker, timeframe, model, predicted_at, horizon_minutes, predicted_price, base_price=None):
+    """Queue a prediction for storage (non-blocking; returns a Future).
+    ``base_price`` is the last price at ``predicted_at``, used for the hit rate."""
+    return get_db().write(_insert_prediction, ticker, timeframe, model, predicted_at, horizon_minutes,
+                          predicted_price, base_price)
+
+def _target_ts(predicted_at, horizon_minutes):
+    """Epoch seconds the forecast was for; decay is measured on this clock"""
+    return datetime.fromisoformat(predicted_at).replace(tzinfo=timezone.utc).timestamp() + horizon_minutes * 60
+
+_HISTORY = """
+SELECT predicted_at, horizon_minutes, predicted_price, actual_price, base_price FROM predictions
+WHERE ticker=? AND timeframe=? AND model=? AND resolved=1 AND id NOT IN (SELECT id FROM _batch)"""
+
+def _push(con, key, basis, state, obs, ts):
+    """Fold one observation into ``state`` for ``basis``: O(1)"""
+    kind, span = parse_basis(basis)
+    if kind == "decay":
+        return decay_add(state, obs, ts, span)
+    slot = state[6] % span
+    evicted = None
+    if state[6] >= span:
+        evicted = con.execute("SELECT abs_err, pct_err, hit FROM error_ring WHERE ticker=? AND timeframe=? AND model=? AND basis=? AND slot=?",
+                              (*key, basis, slot)).fetchone()
+    con.execute("INSERT OR REPLACE INTO error_ring (ticker, timeframe, model, basis, slot, abs_err, pct_err, hit) VALUES (?,?,?,?,?,?,?,?)",
+                (*key, basis, slot, *obs))
+    return window_add(state, obs, evicted)
+
+def _seed(con, key, basis):
+    """Rebuild a basis missing for this series (new setting or pre-existing history)"""
+    kind, span = parse_basis(basis)
+    if kind == "window":
+        rows = con.execute(_HISTORY + f" ORDER BY id DESC LIMIT {int(span)}", key).fetchall()[::-1]
     else:
-        cur.execute("INSERT INTO model_stats (ticker, timeframe, model, mean_abs_error, count, last_updated) VALUES (?,?,?,?,?,?)",
-                    (ticker, timeframe, model, error, 1, datetime.utcnow().isoformat()))
-    
-    con.commit()
-    con.close()
+        rows = con.execute(_HISTORY + " ORDER BY id", key).fetchall()
+    state = EMPTY
+    for predicted_at, horizon, predicted, actual, base in rows:
+        state = _push(con, key, basis, state, observe(predicted, actual, base), _target_ts(predicted_at, horizon))
+    return state
+
+def _update_error_stats(con):
+    """Fold the current _batch into every tracked decayed and windowed basis"""
+    series = {}
+    for ticker, timeframe, model, predicted_at, horizon, predicted, actual, base in con.execute("""
+    SELECT p.ticker, p.timeframe, p.model, p.predicted_at, p.horizon_minutes, p.predicted_price, p.actual_price, p.base_price
+    FROM predictions p JOIN _batch b ON p.id = b.id ORDER BY p.id""").fetchall():
+        series.setdefault((ticker, timeframe, model), []).append(
+            (observe(predicted, actual, base), _target_ts(predicted_at, horizon)))
+
+    for key, items in series.items():
+        for basis in tracked_bases():
+            row = con.execute("""SELECT weight, abs_sum, pct_sum, hit_weight, hit_sum, newest_ts, seq FROM error_stats
+                                 WHERE ticker=? AND timeframe=? AND model=? AND basis=?""", (*key, basis)).fetchone()
+            state = tuple(row) if row else _seed(con, key, basis)
+            for obs, ts in items:
+                state = _push(con, key, basis, state, obs, ts)
+            con.execute("""INSERT OR REPLACE INTO error_stats
+                (ticker, timeframe, model, basis, weight, abs_sum, pct_sum, hit_weight, hit_sum, newest_ts, seq)
+                VALUES (?,?,?,?,?,?,?,?,?,?,?)""", (*key, basis, *state))
+
+def _resolve(con, pred_id, actual_price):
+    return _resolve_many(con, [(pred_id, actual_price)], ())
+
+def resolve_prediction(pred_id, actual_price):
+    """Resolve a prediction by comparing with actual price (queued; returns a Future)"""
+    fut = get_db().write(_resolve, pred_id, actual_price)
+    # Futures complete after COMMIT, so listeners only ever see committed stats
+    fut.add_done_callback(_notify_stats)
+    return fut
+
+def _resolve_many(con, resolutions, expired):
+    # Only rows still unresolved count, so re-running a batch can't double-count errors
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS _batch (id INTEGER PRIMARY KEY)")
+    con.execute("DELETE FROM _batch")
+    con.executemany("INSERT OR IGNORE INTO _batch (id) SELECT id FROM predictions WHERE id=? AND resolved=0",
+                    [(pred_id,) for pred_id, _ in resolutions])
+    con.executemany("UPDATE predictions SET actual_price=?, error=abs(? - predicted_price), resolved=1 WHERE id=? AND resolved=0",
+                    [(price, price, pred_id) for pred_id, price in resolutions])
+    if expired:
+        con.executemany("UPDATE predictions SET resolved=-1 WHERE id=? AND resolved=0", [(i,) for i in expired])
+
+    # Fold the new errors into model_stats, one row per (ticker, timeframe, model)
+    con.execute("""
+    INSERT INTO model_stats (ticker, timeframe, model, mean_abs_error, count, last_updated)
+    SELECT p.ticker, p.timeframe, p.model, AVG(p.error), COUNT(*), ?
+    FROM predictions p JOIN _batch b ON p.id = b.id
+    WHERE true
+    GROUP BY p.ticker, p.timeframe, p.model""" + _UPSERT_STATS, (datetime.utcnow().isoformat(),))
+    _update_error_stats(con)
+    changed = _changed_stats(con)
+    con.execute("DELETE FROM _batch")
+    return changed
+
+def resolve_predictions(resolutions, expired=()):
+    """Resolve many (pred_id, actual_price) pairs and mark ``expired`` ids (resolved=-1,
+    no price available) in one transaction; returns a Future of the updated stats rows"""
+    fut = get_db().write(_resolve_many, list(resolutions), list(expired))
+    fut.add_done_callback(_notify_stats)
+    return fut
+
+def get_arima_order(ticker, timeframe, criterion):
+    """Unexpired selected ARIMA order as ((p, d, q), expires_at), or None"""
+    r = get_db().query_one("SELECT p, d, q, expires_at FROM arima_orders WHERE ticker=? AND timeframe=? AND criterion=? AND expires_at > ?",
+                           (ticker, timeframe, criterion, time.time()))
+    return ((r[0], r[1], r[2]), r[3]) if r else None
+
+def _upsert_arima_order(con, ticker, timeframe, order, criterion, score, orders_fitted, expires_at):
+    con.execute("""
+    INSERT OR REPLACE INTO arima_orders (ticker, timeframe, p, d, q, criterion, score, orders_fitted, selected_at, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (ticker, timeframe, *order, criterion, score, orders_fitted, datetime.utcnow().isoformat(), expires_at))
+
+def store_arima_order(ticker, timeframe, order, criterion, score, orders_fitted, expires_at):
+    """Save the selected ARIMA order for a ticker and timeframe (queued)"""
+    return get_db().write(_upsert_arima_order, ticker, timeframe, order, criterion, score, orders_fitted, expires_at)
 
 def get_model_stats(ticker, timeframe):
     """Get model statistics for a ticker and timeframe"""
-    con = sqlite3.connect(PERF_DB_PATH)
-    cur = con.cursor()
-    cur.execute("SELECT model, mean_abs_error, count FROM model_stats WHERE ticker=? AND timeframe=?", 
-                (ticker, timeframe))
-    rows = cur.fetchall()
-    con.close()
+    rows = get_db().query("SELECT model, mean_abs_error, count FROM model_stats WHERE ticker=? AND timeframe=?",
+                          (ticker, timeframe))
     return [{"model": r[0], "mae": r[1], "count": r[2]} for r in rows]
 
+def get_error_stats(ticker, timeframe):
+    """Lifetime, decayed and windowed MAE, MAPE and hit rate per model and basis"""
+    rows = get_db().query(_STATS_ROWS.format(where="WHERE ticker=? AND timeframe=?", and_="AND"),
+                          (ticker, timeframe) * 2)
+    return [{"model": r[2], "basis": r[3], "mae": r[4], "mape": r[5], "hit_rate": r[6], "count": r[7]} for r in rows]
+
+def get_all_error_stats():
+    """Every stats row as (ticker, timeframe, model, basis, mae, mape, hit_rate, n), for bulk loading"""
+    return get_db().query(_STATS_ROWS.format(where="", and_="WHERE"))
+
 def get_unresolved_predictions():
     """Get all unresolved predictions"""
-    con = sqlite3.connect(PERF_DB_PATH)
-    cur = con.cursor()
-    cur.execute("SELECT id, ticker, timeframe, predicted_at, horizon_minutes FROM predictions WHERE resolved=0")
-    rows = cur.fetchall()
-    con.close()
-    return rows
+    return get_db().query("SELECT id, ticker, timeframe, predicted_at, horizon_minutes FROM predictions WHERE resolved=0")
+
+def get_due_predictions(now_iso):
+    """Unresolved predictions whose target time (predicted_at + horizon) has passed"""
+    return get_db().query("""
+    SELECT id, ticker, timeframe, model, predicted_at, horizon_minutes
+    FROM predictions
+    WHERE resolved = 0 AND predicted_at <= ?
+      AND julianday(predicted_at) + horizon_minutes / 1440.0 <= julianday(?)
+    ORDER BY predicted_at
+    """, (now_iso, now_iso))
 
 def get_recent_predictions(limit=20):
     """Get recent predictions for dashboard"""
-    con = sqlite3.connect(PERF_DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
+    return get_db().query("""
     SELECT ticker, timeframe, model, predicted_at, predicted_price, actual_price, error, resolved
-    FROM predictions 
-    ORDER BY id DESC 
+    FROM predictions
+    ORDER BY id DESC
     LIMIT ?
     """, (limit,))
-    rows = cur.fetchall()
-    con.close()
-    return rows
@@ -1,28 +1,111 @@
+import math
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta
-import yfinance as yf
-from perf_db import get_unresolved_predictions, resolve_prediction
+import numpy as np
+import pandas as pd
+from data_fetcher import fetch_ohlcv_many
+from perf_db import get_due_predictions, resolve_predictions
+from config import SESSION_CLOSE
+
+# Bar length per interval, and the most history the data source serves for it
+BAR_MINUTES = {"1m": 1, "15m": 15, "1h": 60}
+MAX_HISTORY_DAYS = {"1m": 7, "15m": 59, "1h": 729}
+
+# Download periods are rounded up to one of these, so tickers with similar
+# backlogs share a batch without all paying for the oldest one
+PERIOD_BUCKETS = (2, 7, 30, 59, 180, 729)
+
+def _utc_naive(index):
+    """Bar start times as naive UTC, matching predicted_at"""
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return idx
+
+def bar_ends(index, interval, session_close=SESSION_CLOSE):
+    """End time of each bar as naive UTC.
+
+    A bar normally ends one bar length after it starts, but the last bar of a
+    trading day ends at the session close (the 15:30 hourly bar closes at
+    16:00, not 16:30). Times are compared in the index's own (exchange) zone.
+    """
+    idx = pd.DatetimeIndex(index)
+    ends = idx + pd.Timedelta(minutes=BAR_MINUTES.get(interval, 60))
+    day = idx.normalize()
+    close = day + pd.Timedelta(hours=int(session_close[:2]), minutes=int(session_close[3:5]))
+    last_of_day = ~day.duplicated(keep="last")
+    clamp = last_of_day & (close > idx) & (close < ends)
+    return _utc_naive(ends.where(~clamp, close))
+
+def price_at(df, interval, targets):
+    """Close of the last bar that ended at or before each target time.
+
+    Returns an array aligned with ``targets``: NaN where the data doesn't reach
+    the target yet, -inf where the target is older than the first bar.
+    """
+    ends = bar_ends(df.index, interval).values
+    close = df['Close'].astype(float).values
+    t = np.asarray(targets, dtype="datetime64[ns]")
+    pos = np.searchsorted(ends, t, side="right") - 1
+    out = np.where(pos >= 0, close[np.clip(pos, 0, None)], -np.inf)
+    # The bar covering the target must have been published
+    out[t > ends[-1]] = np.nan
+    return out
 
 def check_and_resolve():
     """Background job to resolve predictions"""
-    rows = get_unresolved_predictions()
-    
-    for r in rows:
-        pred_id, ticker, timeframe, predicted_at_str, horizon = r
-        predicted_at = datetime.fromisoformat(predicted_at_str)
-        target_time = predicted_at + timedelta(minutes=horizon)
-        
-        if datetime.utcnow() >= target_time:
-            # Fetch latest close price
-            interval = "1m" if timeframe=="1m" else ("15m" if timeframe=="15m" else "1h")
-            try:
-                df = yf.download(ticker, period="1d", interval=interval, progress=False)
-                if df is None or df.empty:
-                    continue
-                actual_price = float(df['Close'].iloc[-1])
-                resolve_prediction(pred_id, actual_price)
-            except Exception as e:
-                print(f"Error resolving prediction {pred_id}: {e}")
+    now = datetime.utcnow()
+    rows = get_due_predictions(now.isoformat())
+    if not rows:
+        return
+
+    # Group due predictions by (ticker, interval) with their target times. Targets
+    # older than the source's history can never be priced: expire them outright.
+    groups, expired = {}, []
+    for pred_id, ticker, timeframe, _model, predicted_at_str, horizon in rows:
+        target = datetime.fromisoformat(predicted_at_str) + timedelta(minutes=horizon)
+        interval = timeframe if timeframe in BAR_MINUTES else "1h"
+        if now - target >= timedelta(days=MAX_HISTORY_DAYS[interval]):
+            expired.append(pred_id)
+        else:
+            groups.setdefault((ticker, interval), []).append((pred_id, target))
+
+    # Batch tickers by (interval, period); each period covers that ticker's oldest target
+    batches = {}
+    for (ticker, interval), preds in groups.items():
+        oldest = min(t for _, t in preds)
+        days = math.ceil((now - oldest).total_seconds() / 86400) + 1
+        days = min([b for b in PERIOD_BUCKETS if b >= days] + [MAX_HISTORY_DAYS[interval]])
+        batches.setdefault((interval, days), []).append(ticker)
+
+    frames = {}
+    for (interval, days), tickers in batches.items():
+        for ticker, dfs in fetch_ohlcv_many(sorted(tickers), intervals=(interval,), period=f"{days}d").items():
+            frames[(ticker, interval)] = dfs[interval]
+
+    resolutions = []
+    for key, preds in groups.items():
+        df = frames.get(key)
+        if df is None or df.empty:
+            continue
+        try:
+            prices = price_at(df, key[1], [t for _, t in preds])
+        except Exception as e:
+            print(f"Error pricing predictions for {key}: {e}")
+            continue
+        for (pred_id, _), price in zip(preds, prices):
+            if np.isnan(price):
+                continue  # bar not published yet; retry next run
+            if np.isinf(price):
+                expired.append(pred_id)  # older than the available history
+            else:
+                resolutions.append((pred_id, float(price)))
+
+    if resolutions or expired:
+        try:
+            resolve_predictions(resolutions, expired).result()
+        except Exception as e:
+            print(f"Error resolving predictions: {e}")
 
 def start_scheduler():
     """Start the background scheduler"""
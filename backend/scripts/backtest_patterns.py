@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+from data_fetcher import fetch_ohlcv_many
+from pattern_analyzer import PATTERNS, PATTERN_DIRECTION, pattern_hit_rates
+
+def run(tickers, interval, period, horizon):
+    """Pooled pattern hit rates across tickers"""
+    frames = fetch_ohlcv_many(tickers, intervals=(interval,), period=period)
+    t0 = time.perf_counter()
+    totals = {p: {"count": 0, "hits": 0, "ret_sum": 0.0} for p in PATTERNS}
+    candles = 0
+    for ticker in tickers:
+        df = frames[ticker][interval]
+        if df.empty:
+            continue
+        candles += len(df)
+        for name, r in pattern_hit_rates(df, horizon=horizon).items():
+            t = totals[name]
+            t["count"] += r["count"]
+            if r["count"]:
+                t["ret_sum"] += r["avg_return"] * r["count"]
+                if r["hit_rate"] is not None:
+                    t["hits"] += r["hit_rate"] * r["count"]
+    elapsed = time.perf_counter() - t0
+
+    print(f"{len(tickers)} tickers, {candles} candles at {interval}, horizon {horizon} bar(s), "
+          f"scanned in {elapsed*1000:.1f} ms")
+    print(f"{'pattern':<20}{'count':>8}{'hit rate':>10}{'avg ret':>10}")
+    for name in PATTERNS:
+        t = totals[name]
+        n = t["count"]
+        hit = f"{t['hits']/n:.1%}" if n and PATTERN_DIRECTION[name] else "-"
+        ret = f"{t['ret_sum']/n:.3%}" if n else "-"
+        print(f"{name:<20}{n:>8}{hit:>10}{ret:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest candlestick pattern hit rates over history")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--horizon", type=int, default=1, help="bars ahead to measure the move")
+    args = parser.parse_args()
+    run([t.upper() for t in args.tickers], args.interval, args.period, args.horizon)
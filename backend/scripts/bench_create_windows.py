@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+import tracemalloc
+import numpy as np
+from lstm_model import create_windows
+
+def create_windows_loop(arr, window=32):
+    """Previous list-of-slices implementation, kept here as the baseline"""
+    X, y = [], []
+    for i in range(len(arr)-window):
+        X.append(arr[i:i+window])
+        y.append(arr[i+window])
+    return np.array(X), np.array(y)
+
+def measure(fn, arr, window, repeat):
+    """Best wall time (ms) and peak traced allocation (MB) over ``repeat`` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arr, window)
+        best = min(best, time.perf_counter() - t0)
+    
+    tracemalloc.start()
+    X, y = fn(arr, window)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LSTM sliding-window construction")
+    parser.add_argument("--sizes", default="3500,25000,200000", help="series lengths (2y of 1h ~ 3.5k bars)")
+    parser.add_argument("--window", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'bars':>10} {'loop ms':>10} {'view ms':>10} {'speedup':>8} {'loop MB':>9} {'view MB':>9}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        arr = np.random.default_rng(0).random(n, dtype=np.float32)
+        loop_ms, loop_mb = measure(create_windows_loop, arr, args.window, args.repeat)
+        view_ms, view_mb = measure(create_windows, arr, args.window, args.repeat)
+        
+        Xa, ya = create_windows_loop(arr, args.window)
+        Xb, yb = create_windows(arr, args.window)
+        assert np.array_equal(Xa, Xb) and np.array_equal(ya, yb)
+        
+        print(f"{n:>10} {loop_ms:>10.2f} {view_ms:>10.3f} {loop_ms / view_ms:>7.0f}x {loop_mb:>9.1f} {view_mb:>9.3f}")
+
+if __name__ == "__main__":
+    main()
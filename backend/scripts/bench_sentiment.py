@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import asyncio
+import argparse
+from sentiment_cache import SentimentCache
+from sentiment_service import SentimentService, HTTPBackend
+from scripts.mock_llm_server import serve
+
+def make_batch(tickers, headlines):
+    return {f"T{i:03d}": [f"T{i:03d} headline {j} about quarterly results" for j in range(headlines)]
+            for i in range(tickers)}
+
+async def run(batch, url, concurrency, pack_size):
+    service = SentimentService(HTTPBackend(url), max_concurrency=concurrency, pack_size=pack_size,
+                               base_delay=0.1, cache=SentimentCache(db_path=None))
+    t0 = time.perf_counter()
+    await service.score_many(batch)
+    return time.perf_counter() - t0, service.stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark packed, concurrent LLM sentiment against the mock server")
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--headlines", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--rps", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = serve(port=args.port, latency_ms=args.latency_ms, rps=args.rps)
+    url = f"http://127.0.0.1:{args.port}/generate"
+    batch = make_batch(args.tickers, args.headlines)
+    print(f"{args.tickers} tickers x {args.headlines} headlines, {args.latency_ms:.0f} ms per call")
+
+    # concurrency 1 with one ticker per prompt is the old one-call-per-ticker behaviour
+    for concurrency, pack in [(1, args.headlines), (4, args.headlines), (4, 40), (8, 40)]:
+        wall, stats = asyncio.run(run(batch, url, concurrency, pack))
+        print(f"concurrency={concurrency:<2} pack={pack:<3} {wall:7.2f}s  calls={stats['calls']:<4} "
+              f"429s={stats['rate_limited']} failed={stats['failed_calls']}")
+    server.shutdown()
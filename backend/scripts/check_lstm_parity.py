@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import argparse
+import tempfile
+import numpy as np
+from lstm_numpy import save_lstm_artifact, load_lstm_artifact, numpy_artifact_path
+from config import LSTM_MODEL_DIR
+
+def check_parity(model, npz_path, steps=3, n=16, tol=1e-4):
+    """Compare Keras and NumPy forecasts on random scaled windows; returns max abs diff"""
+    from lstm_model import KerasForecaster
+    
+    window = model.input_shape[1]
+    x = np.random.default_rng(0).random((n, window), dtype=np.float32)
+    keras_out = KerasForecaster(model).forecast(x, steps)
+    numpy_out = load_lstm_artifact(npz_path)[0].forecast(x, steps)
+    diff = float(np.abs(keras_out - numpy_out).max())
+    status = "✅" if diff <= tol else "❌"
+    print(f"{status} parity {os.path.basename(npz_path)}: max abs diff {diff:.2e} over {n}x{steps} forecasts")
+    return diff
+
+def main():
+    parser = argparse.ArgumentParser(description="Check NumPy LSTM artifacts against their Keras models")
+    parser.add_argument("models", nargs="*", help="Keras .h5 files (default: all in LSTM_MODEL_DIR)")
+    parser.add_argument("--tol", type=float, default=1e-4)
+    args = parser.parse_args()
+    
+    from tensorflow.keras.models import load_model
+    
+    paths = args.models or sorted(glob.glob(os.path.join(LSTM_MODEL_DIR, "*_lstm.h5")))
+    worst = 0.0
+    
+    if not paths:
+        # No trained models: check the forward pass on a randomly initialised one
+        from lstm_model import build_lstm
+        model = build_lstm((32,1))
+        with tempfile.TemporaryDirectory() as tmp:
+            npz = save_lstm_artifact(os.path.join(tmp, "random_lstm.npz"), model, [0.0], [1.0])
+            worst = check_parity(model, npz, tol=args.tol)
+    
+    for path in paths:
+        npz = numpy_artifact_path(path)
+        if not os.path.exists(npz):
+            print(f"⚠️ no artifact for {path}; retrain it to produce {npz}")
+            continue
+        worst = max(worst, check_parity(load_model(path, compile=False), npz, tol=args.tol))
+    
+    if worst > args.tol:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
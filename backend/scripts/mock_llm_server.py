@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-in for an LLM endpoint, for testing and benchmarking the
+# sentiment service with SENTIMENT_LLM_BACKEND=http. POST {"prompt": ...}
+# answers {"text": "{\"id\": score, ...}"} for the JSON items in the prompt.
+
+class RateLimiter:
+    """At most ``rps`` requests per second; 0 disables limiting"""
+
+    def __init__(self, rps):
+        self.rps = rps
+        self.window = []
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if not self.rps:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            self.window = [t for t in self.window if now - t < 1.0]
+            if len(self.window) >= self.rps:
+                return False
+            self.window.append(now)
+            return True
+
+def fake_score(headline):
+    """Deterministic score in [-1, 1] from the headline text"""
+    h = int(hashlib.sha1(headline.encode("utf-8")).hexdigest()[:8], 16)
+    return round(h / 0xFFFFFFFF * 2 - 1, 3)
+
+def make_handler(latency_ms, limiter, counters):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, code, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            counters["requests"] += 1
+            if not limiter.allow():
+                counters["throttled"] += 1
+                return self._reply(429, {"error": "rate limited"}, {"Retry-After": "0.2"})
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            m = re.search(r"\[.*\]", body.get("prompt", ""), re.S)
+            items = json.loads(m.group()) if m else []
+            time.sleep(latency_ms / 1000.0)
+            scores = {it["id"]: fake_score(it["headline"]) for it in items}
+            self._reply(200, {"text": json.dumps(scores)})
+
+        def do_GET(self):
+            self._reply(200, counters)
+
+    return Handler
+
+def serve(host="127.0.0.1", port=8765, latency_ms=300, rps=0):
+    """Run the mock server in a background thread; returns the server"""
+    counters = {"requests": 0, "throttled": 0}
+    server = ThreadingHTTPServer((host, port), make_handler(latency_ms, RateLimiter(rps), counters))
+    server.counters = counters
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock LLM endpoint for sentiment scoring")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300, help="simulated model latency per call")
+    parser.add_argument("--rps", type=int, default=0, help="answer 429 above this many requests/second (0 = off)")
+    args = parser.parse_args()
+    server = serve(args.host, args.port, args.latency_ms, args.rps)
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/generate")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
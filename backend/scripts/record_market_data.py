@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import pandas as pd
+from market_data import YFinanceProvider
+from news_fetcher import parse_news_item
+from config import REPLAY_DATA_DIR
+
+def record(tickers, intervals, period, out_dir, fmt="csv"):
+    """Record OHLCV and news from yfinance into a ReplayProvider directory"""
+    provider = YFinanceProvider()
+    os.makedirs(out_dir, exist_ok=True)
+    
+    for interval in intervals:
+        frames = provider.download(tickers, interval, period=period)
+        for ticker, df in frames.items():
+            if df.empty:
+                print(f"No {interval} data for {ticker}")
+                continue
+            path = os.path.join(out_dir, f"{ticker}_{interval}.{fmt}")
+            if fmt == "parquet":
+                df.to_parquet(path)
+            else:
+                df.to_csv(path)
+            print(f"✅ {ticker} {interval}: {len(df)} bars -> {path}")
+    
+    for ticker in tickers:
+        items = [parse_news_item(n) for n in provider.news(ticker)]
+        rows = [{"id": i.id, "title": i.title, "summary": i.summary, "url": i.url} for i in items if i]
+        path = os.path.join(out_dir, f"{ticker}_news.csv")
+        pd.DataFrame(rows, columns=["id", "title", "summary", "url"]).to_csv(path, index=False)
+        print(f"✅ {ticker} news: {len(rows)} items -> {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record market data for offline replay")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--intervals", default="1m,15m,1h")
+    parser.add_argument("--period", default="5d")
+    parser.add_argument("--out", default=REPLAY_DATA_DIR)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    args = parser.parse_args()
+    
+    record([t.upper() for t in args.tickers], args.intervals.split(","), args.period, args.out, args.format)
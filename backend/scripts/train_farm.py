@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from data_fetcher import fetch_ohlcv_many
+from config import LSTM_MODEL_DIR
+
+# Longest history yfinance serves per interval
+DEFAULT_PERIODS = {"1m": "7d", "15m": "60d", "1h": "2y", "1d": "10y"}
+
+def _init_worker(threads):
+    """Cap TensorFlow/BLAS threads so N workers don't oversubscribe the CPU"""
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _train_job(ticker, tf, closes, window, epochs, fingerprint):
+    """Train one model in a worker process; returns a summary row"""
+    import pandas as pd
+    from lstm_model import train_lstm
+    from lstm_numpy import read_lstm_metadata, numpy_artifact_path
+
+    model_path = os.path.join(LSTM_MODEL_DIR, f"{ticker}_{tf}_lstm.h5")
+    t0 = time.perf_counter()
+    train_lstm(pd.Series(closes), model_path, window=window, epochs=epochs, verbose=0)
+    meta = read_lstm_metadata(numpy_artifact_path(model_path))
+    return {
+        "ticker": ticker, "timeframe": tf, "status": "trained",
+        "wall_s": round(time.perf_counter() - t0, 2),
+        "val_loss": meta.get("val_loss"), "samples": meta.get("samples"),
+        "fingerprint": fingerprint,
+    }
+
+def _fingerprint(df):
+    """Hash of the close series; unchanged data means the model can be skipped"""
+    closes = np.ascontiguousarray(df['Close'].astype(float).values)
+    h = hashlib.sha256(closes.tobytes())
+    h.update(str(df.index[-1]).encode())
+    return h.hexdigest()
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def _save_json(path, data):
+    """Write atomically so an interrupted run never leaves a truncated file"""
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+def run(tickers, timeframes, workers, threads, window=32, epochs=30, state_path=None, summary_path=None, force=False):
+    """Train every ticker x timeframe model across a process pool"""
+    state_path = state_path or os.path.join(LSTM_MODEL_DIR, "train_farm_state.json")
+    summary_path = summary_path or os.path.join(LSTM_MODEL_DIR, "train_farm_summary.json")
+    state = _load_state(state_path)
+    rows = []
+    jobs = []
+
+    # Shared prefetch: one batched download per timeframe for every ticker
+    for tf in timeframes:
+        period = DEFAULT_PERIODS.get(tf, "2y")
+        print(f"Fetching {len(tickers)} tickers at {tf} ({period})...")
+        frames = fetch_ohlcv_many(tickers, intervals=(tf,), period=period)
+        for ticker in tickers:
+            df = frames[ticker][tf]
+            key = f"{ticker}_{tf}"
+            if df.empty or len(df) <= window:
+                rows.append({"ticker": ticker, "timeframe": tf, "status": "no_data"})
+                continue
+            fp = _fingerprint(df)
+            artifact = os.path.join(LSTM_MODEL_DIR, f"{key}_lstm.npz")
+            done = state.get(key)
+            if not force and done and done.get("fingerprint") == fp and os.path.exists(artifact):
+                rows.append(dict(done, status="skipped", wall_s=0.0))
+                continue
+            jobs.append((ticker, tf, df['Close'].astype(float).values, fp))
+
+    print(f"{len(jobs)} models to train, {len(rows)} skipped/no data; {workers} workers x {threads} threads")
+    t_start = time.perf_counter()
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(_train_job, t, tf, closes, window, epochs, fp): (t, tf)
+                   for t, tf, closes, fp in jobs}
+        for fut in as_completed(futures):
+            ticker, tf = futures[fut]
+            try:
+                row = fut.result()
+                # Checkpoint after every model so a killed run resumes where it stopped
+                state[f"{ticker}_{tf}"] = row
+                _save_json(state_path, state)
+                print(f"✅ {ticker} {tf}: {row['wall_s']}s val_loss={row['val_loss']}")
+            except Exception as e:
+                row = {"ticker": ticker, "timeframe": tf, "status": "failed", "error": str(e)}
+                print(f"❌ {ticker} {tf}: {e}")
+            rows.append(row)
+
+    summary = {
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wall_s": round(time.perf_counter() - t_start, 2),
+        "workers": workers, "threads_per_worker": threads,
+        "trained": sum(r["status"] == "trained" for r in rows),
+        "skipped": sum(r["status"] == "skipped" for r in rows),
+        "failed": sum(r["status"] == "failed" for r in rows),
+        "models": sorted(rows, key=lambda r: (r["ticker"], r["timeframe"])),
+    }
+    _save_json(summary_path, summary)
+    print(f"Done in {summary['wall_s']}s: {summary['trained']} trained, {summary['skipped']} skipped, "
+          f"{summary['failed']} failed. Summary: {summary_path}")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train LSTM models for many tickers and timeframes in parallel")
+    parser.add_argument("tickers", nargs="*", help="ticker symbols")
+    parser.add_argument("--tickers-file", help="file with one ticker per line")
+    parser.add_argument("--timeframes", default="1h")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=2)
+    parser.add_argument("--window", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--state", help="resume state file (default: LSTM_MODEL_DIR/train_farm_state.json)")
+    parser.add_argument("--summary", help="summary output (default: LSTM_MODEL_DIR/train_farm_summary.json)")
+    parser.add_argument("--force", action="store_true", help="retrain even if data is unchanged")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    if not tickers:
+        parser.error("no tickers given")
+
+    run(list(dict.fromkeys(tickers)), args.timeframes.split(","), args.workers, args.threads_per_worker,
+        window=args.window, epochs=args.epochs, state_path=args.state, summary_path=args.summary, force=args.force)
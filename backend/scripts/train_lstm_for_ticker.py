@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import yfinance as yf
+from market_data import get_provider
 from lstm_model import train_lstm
 from config import LSTM_MODEL_DIR
 
@@ -10,7 +10,7 @@ def train(ticker, tf="1h", period="2y", window=32):
     """Train LSTM model for a specific ticker and timeframe"""
     print(f"Training LSTM for {ticker} on {tf} timeframe...")
     
-    df = yf.download(ticker, period=period, interval=tf, progress=False)
+    df = get_provider().download([ticker], tf, period=period)[ticker]
     
     if df.empty:
         print(f"No data available for {ticker}")
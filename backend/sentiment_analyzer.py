@@ -1,80 +1,71 @@
 from textblob import TextBlob
 import google.generativeai as genai
 from config import GEMINI_API_KEY
-import yfinance as yf
+from news_fetcher import news_fetcher, scorable_headlines
+from sentiment_cache import sentiment_cache
+from sentiment_service import GEMINI_MODEL, build_prompt, parse_scores
 
 # Configure Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
 def fetch_news_headlines(ticker: str, limit=5):
-    """Fetch recent news headlines for a ticker"""
-    try:
-        stock = yf.Ticker(ticker)
-        news = stock.news[:limit] if stock.news else []
-        headlines = []
-        for item in news:
-            title = item.get('title', '')
-            summary = item.get('summary', '')
-            if title:
-                headlines.append(f"{title}. {summary}" if summary else title)
-        
-        if not headlines:
-            # Fallback stub
-            headlines = [f"{ticker} shows market activity with recent trading patterns."]
-        
-        return headlines
-    except Exception as e:
-        print(f"Error fetching news for {ticker}: {e}")
-        return [f"{ticker} market data available for analysis."]
+    """Fetch recent news headlines for a ticker (real stories only; empty if there are none)"""
+    return scorable_headlines(news_fetcher.get(ticker, limit=limit))
+
+def aggregate_scores(texts, scores):
+    """Mean of the per-headline scores, with (headline, score) reasons"""
+    reasons = [(t, scores[t]) for t in texts if t in scores]
+    agg = sum(sc for _, sc in reasons)/len(reasons) if reasons else 0.0
+    return agg, reasons
 
 def score_sentiment_textblob(texts):
     """Score sentiment using TextBlob"""
     if not texts:
         return 0.0, []
     
-    scores = []
-    reasons = []
-    
+    # Only headlines not scored recently go through TextBlob
+    scores = sentiment_cache.get_many("textblob", texts)
+    new = {}
     for t in texts:
+        if t in scores or t in new:
+            continue
         try:
-            p = TextBlob(t).sentiment.polarity
-            scores.append(p)
-            reasons.append((t, p))
+            new[t] = TextBlob(t).sentiment.polarity
         except:
             continue
+    sentiment_cache.put_many("textblob", new)
+    scores.update(new)
     
-    agg = sum(scores)/len(scores) if scores else 0.0
-    return agg, reasons
+    return aggregate_scores(texts, scores)
+
+_gemini_model = None
+
+def _gemini_scores(texts, ticker):
+    """Ask Gemini for one score per headline; returns {headline: score}"""
+    global _gemini_model
+    if _gemini_model is None:
+        _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+    
+    items = [(str(i), ticker, t) for i, t in enumerate(texts)]
+    response = _gemini_model.generate_content(build_prompt(items))
+    scores = parse_scores(response.text, [i for i, _, _ in items])
+    return {t: scores[i] for i, _, t in items}
 
 def score_sentiment_gemini(texts, ticker):
-    """Score sentiment using Gemini AI"""
+    """Score sentiment using Gemini AI (blocking; the engine uses SentimentService)"""
     if not GEMINI_API_KEY or not texts:
         return score_sentiment_textblob(texts)
     
+    texts = texts[:5]
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        combined_text = "\n".join(texts[:5])
-        
-        prompt = f"""Analyze the sentiment of these news headlines about {ticker}.
-Provide a sentiment score between -1.0 (very negative) and 1.0 (very positive).
-Return only the numerical score.
-
-Headlines:
-{combined_text}
-
-Sentiment Score:"""
-        
-        response = model.generate_content(prompt)
-        score_text = response.text.strip()
-        
-        # Extract number from response
-        import re
-        match = re.search(r'-?\d+\.?\d*', score_text)
-        if match:
-            score = float(match.group())
-            score = max(-1.0, min(1.0, score))  # Clamp to [-1, 1]
-            return score, [("Gemini AI Analysis", score)]
+        scores = sentiment_cache.get_many(GEMINI_MODEL, texts)
+        unseen = [t for t in dict.fromkeys(texts) if t not in scores]
+        if unseen:
+            new = _gemini_scores(unseen, ticker)
+            sentiment_cache.put_many(GEMINI_MODEL, new)
+            scores.update(new)
+        return aggregate_scores(texts, scores)
     except Exception as e:
         print(f"Gemini sentiment error: {e}")
     
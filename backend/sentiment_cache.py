@@ -0,0 +1,103 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from db import get_db
+from config import SENTIMENT_CACHE_TTL, SENTIMENT_CACHE_MAX, SENTIMENT_CACHE_DB
+
+
+def headline_key(model, text):
+    """Cache key for one headline scored by one model"""
+    return hashlib.sha1(f"{model}\0{text.strip()}".encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """Per-headline sentiment scores keyed by hash(model, text).
+
+    Entries expire after ``ttl`` seconds and the least recently used are
+    evicted beyond ``max_entries``. With ``db_path`` set, scores are also
+    written to sqlite and read back on a memory miss, so a restart does not
+    re-score the same news.
+    """
+
+    def __init__(self, ttl=SENTIMENT_CACHE_TTL, max_entries=SENTIMENT_CACHE_MAX, db_path=SENTIMENT_CACHE_DB):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.db_path:
+            self._init_db()
+
+    def _init_db(self):
+        with get_db(self.db_path).transaction() as con:
+            con.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                score REAL,
+                scored_at REAL
+            )""")
+
+    def get_many(self, model, texts):
+        """Fresh cached scores as {text: score}; texts not returned need scoring"""
+        now = time.time()
+        keys = {headline_key(model, t): t for t in texts}
+        found = {}
+        with self._lock:
+            for k, t in keys.items():
+                entry = self._data.get(k)
+                if entry is not None and now - entry[1] < self.ttl:
+                    self._data.move_to_end(k)
+                    found[t] = entry[0]
+
+        missing = [k for k, t in keys.items() if t not in found]
+        if missing and self.db_path:
+            for k, score, scored_at in self._load(missing, now):
+                found[keys[k]] = score
+                self._remember(k, score, scored_at)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model, scores):
+        """Store {text: score} for ``model``"""
+        now = time.time()
+        rows = [(headline_key(model, t), model, float(s), now) for t, s in scores.items()]
+        for k, _, s, ts in rows:
+            self._remember(k, s, ts)
+        if rows and self.db_path:
+            get_db(self.db_path).write(
+                lambda con: con.executemany("INSERT OR REPLACE INTO sentiment_cache (key, model, score, scored_at) VALUES (?,?,?,?)", rows))
+
+    def _remember(self, key, score, scored_at):
+        with self._lock:
+            self._data[key] = (score, scored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _load(self, keys, now):
+        try:
+            marks = ",".join("?" * len(keys))
+            return get_db(self.db_path).query(
+                f"SELECT key, score, scored_at FROM sentiment_cache WHERE key IN ({marks}) AND scored_at > ?",
+                (*keys, now - self.ttl))
+        except Exception as e:
+            print(f"Sentiment cache read error: {e}")
+            return []
+
+    def stats(self):
+        """Hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+# Shared cache used by sentiment_analyzer
+sentiment_cache = SentimentCache()
@@ -0,0 +1,205 @@
+import re
+import json
+import random
+import asyncio
+import requests
+from sentiment_cache import sentiment_cache
+from executors import run_io
+from config import (GEMINI_API_KEY, SENTIMENT_LLM_BACKEND, SENTIMENT_LLM_URL, SENTIMENT_LLM_CONCURRENCY,
+                    SENTIMENT_LLM_RETRIES, SENTIMENT_PACK_SIZE, SENTIMENT_LLM_TIMEOUT)
+
+GEMINI_MODEL = 'gemini-pro'
+
+
+class RateLimited(Exception):
+    """The LLM backend answered 429; ``retry_after`` is its hint in seconds, if any"""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"rate limited (retry after {retry_after})")
+        self.retry_after = retry_after
+
+
+def build_prompt(items):
+    """One prompt for headlines of any number of tickers; items are (id, ticker, headline)"""
+    payload = [{"id": i, "ticker": t, "headline": h} for i, t, h in items]
+    return f"""Score the sentiment of each news headline for the stock it is listed under.
+Use a number between -1.0 (very negative) and 1.0 (very positive).
+Return only a JSON object mapping each "id" to its score, with no other text.
+
+{json.dumps(payload)}"""
+
+def parse_scores(text, ids):
+    """{id: score} from a model reply; raises ValueError if any id is missing"""
+    m = re.search(r"\{.*\}", text, re.S)
+    if not m:
+        raise ValueError(f"no JSON object in reply: {text[:80]!r}")
+    data = json.loads(m.group())
+    missing = [i for i in ids if i not in data]
+    if missing:
+        raise ValueError(f"reply is missing {len(missing)} of {len(ids)} scores")
+    return {i: max(-1.0, min(1.0, float(data[i]))) for i in ids}
+
+
+class GeminiBackend:
+    """Gemini through one reused GenerativeModel and its async API"""
+
+    name = GEMINI_MODEL
+
+    def __init__(self, model_name=GEMINI_MODEL, api_key=GEMINI_API_KEY, timeout=SENTIMENT_LLM_TIMEOUT):
+        import google.generativeai as genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.name = model_name
+        self.timeout = timeout
+        self._model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt):
+        from google.api_core.exceptions import ResourceExhausted
+        try:
+            # wait_for cancels the call too; request_options only bounds the HTTP request
+            response = await asyncio.wait_for(
+                self._model.generate_content_async(prompt, request_options={"timeout": self.timeout}),
+                self.timeout)
+        except ResourceExhausted:
+            raise RateLimited()
+        except asyncio.TimeoutError:
+            # Not retried: the pack counts as failed and its headlines fall back to TextBlob
+            raise TimeoutError(f"{self.name} gave no reply within {self.timeout:g}s")
+        return response.text
+
+
+class HTTPBackend:
+    """Any endpoint taking {"prompt"} and answering {"text"} (see scripts/mock_llm_server.py)"""
+
+    def __init__(self, url=SENTIMENT_LLM_URL, name="http-llm", timeout=SENTIMENT_LLM_TIMEOUT):
+        self.url = url
+        self.name = name
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _post(self, prompt):
+        r = self._session.post(self.url, json={"prompt": prompt}, timeout=self.timeout)
+        if r.status_code == 429:
+            retry_after = r.headers.get("Retry-After")
+            raise RateLimited(float(retry_after) if retry_after else None)
+        r.raise_for_status()
+        return r.json()["text"]
+
+    async def generate(self, prompt):
+        return await run_io(self._post, prompt)
+
+
+def get_backend():
+    """Backend selected by SENTIMENT_LLM_BACKEND, or None when no LLM is configured"""
+    if SENTIMENT_LLM_BACKEND == "http":
+        return HTTPBackend()
+    if SENTIMENT_LLM_BACKEND == "gemini" and GEMINI_API_KEY:
+        return GeminiBackend()
+    return None
+
+
+class SentimentService:
+    """Batched, concurrent LLM headline scoring.
+
+    Unseen headlines of all requested tickers are packed ``pack_size`` at a
+    time into one structured prompt. At most ``max_concurrency`` prompts are
+    in flight, and 429 replies are retried with jittered exponential backoff
+    (or the server's Retry-After). Per-headline scores go through the shared
+    sentiment cache, and anything the LLM can't score falls back to TextBlob.
+    """
+
+    def __init__(self, backend, max_concurrency=SENTIMENT_LLM_CONCURRENCY, max_retries=SENTIMENT_LLM_RETRIES,
+                 pack_size=SENTIMENT_PACK_SIZE, base_delay=1.0, cache=sentiment_cache):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.pack_size = pack_size
+        self.base_delay = base_delay
+        self.cache = cache
+        self._sem = None
+        self._max_concurrency = max_concurrency
+        self._resume_at = 0.0
+        self.stats = {"calls": 0, "headlines": 0, "rate_limited": 0, "failed_calls": 0}
+
+    def _semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._max_concurrency)
+        return self._sem
+
+    async def _call(self, items):
+        prompt = build_prompt(items)
+        ids = [i for i, _, _ in items]
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore():
+                    # After a 429 every caller holds off until the shared cooldown ends
+                    wait = self._resume_at - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self.stats["calls"] += 1
+                    text = await self.backend.generate(prompt)
+                return parse_scores(text, ids)
+            except RateLimited as e:
+                self.stats["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    raise
+                delay = max(e.retry_after or 0.0, self.base_delay * 2 ** attempt)
+                delay *= 1 + random.random() * 0.25
+                self._resume_at = max(self._resume_at, loop.time() + delay)
+
+    async def score_many(self, batch):
+        """Score {ticker: [headlines]}; returns {ticker: (score, [(headline, score), ...])}"""
+        from sentiment_analyzer import score_sentiment_textblob, aggregate_scores
+
+        model = self.backend.name
+        # One lookup for the whole batch, off the loop: a memory miss may hit sqlite
+        cached = await run_io(self.cache.get_many, model, list({t for texts in batch.values() for t in texts}))
+        known = {}
+        items = []
+        for ticker, texts in batch.items():
+            known[ticker] = {t: cached[t] for t in texts if t in cached}
+            for t in dict.fromkeys(texts):
+                if t not in known[ticker]:
+                    items.append((f"{len(items)}", ticker, t))
+
+        packs = [items[i:i + self.pack_size] for i in range(0, len(items), self.pack_size)]
+        replies = await asyncio.gather(*(self._call(p) for p in packs), return_exceptions=True)
+
+        fresh = {}
+        for pack, reply in zip(packs, replies):
+            if isinstance(reply, Exception):
+                self.stats["failed_calls"] += 1
+                print(f"LLM sentiment error: {reply}")
+                continue
+            for i, ticker, text in pack:
+                known[ticker][text] = fresh[text] = reply[i]
+        if fresh:
+            await run_io(self.cache.put_many, model, fresh)
+        self.stats["headlines"] += len(fresh)
+
+        out = {}
+        for ticker, texts in batch.items():
+            if all(t in known[ticker] for t in texts):
+                out[ticker] = aggregate_scores(texts, known[ticker])
+            else:
+                out[ticker] = await run_io(score_sentiment_textblob, texts)
+        return out
+
+    async def score(self, ticker, texts):
+        """Score one ticker's headlines"""
+        if not texts:
+            return 0.0, []
+        return (await self.score_many({ticker: texts}))[ticker]
+
+
+_service = None
+
+def get_sentiment_service():
+    """Shared service, or None when no LLM backend is configured"""
+    global _service
+    if _service is None:
+        backend = get_backend()
+        if backend is not None:
+            _service = SentimentService(backend)
+    return _service
@@ -6,22 +6,23 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import List, Literal, Optional
 import uuid
 from datetime import datetime, timezone
 
 # Import financial agent modules
-from data_fetcher import fetch_ohlcv
-from pattern_analyzer import detect_patterns
-from sentiment_analyzer import fetch_news_headlines, score_sentiment
-from arima_util import arima_one_step_forecast
-from lstm_model import predict_lstm
-from ensemble_agent import EnsembleAgent
+from analysis_engine import AnalysisEngine
 from report_agent import format_short_report
 from telegram_handler import send_msg
-from perf_db import init_db, store_prediction, get_recent_predictions, get_model_stats
+from perf_db import init_db, get_recent_predictions, get_model_stats, get_error_stats
 from scheduler import start_scheduler
-from config import LSTM_MODEL_DIR
+from data_fetcher import ohlcv_cache
+from lstm_model import model_registry
+from arima_service import arima_service
+from sentiment_cache import sentiment_cache
+from news_fetcher import news_fetcher
+from executors import run_io, shutdown_executors
+from db import close_databases
 
 
 ROOT_DIR = Path(__file__).parent
@@ -38,8 +39,8 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Initialize ensemble agent
-ensemble = EnsembleAgent()
+# Initialize the shared analysis engine (owns the ensemble agent)
+engine = AnalysisEngine()
 
 
 # Define Models
@@ -55,6 +56,13 @@ class StatusCheckCreate(BaseModel):
 
 class AnalysisRequest(BaseModel):
     ticker: str
+    # Timeframe profile, e.g. ["1h"]; omitted runs the default (ANALYSIS_TIMEFRAMES).
+    # Unknown values are rejected with 422 before reaching the engine.
+    timeframes: Optional[List[Literal["1m", "15m", "1h"]]] = None
+
+class ScanRequest(BaseModel):
+    tickers: List[str]
+    interval: str = "1h"
 
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
@@ -93,79 +101,47 @@ async def analyze_ticker(request: AnalysisRequest):
     ticker = request.ticker.upper()
     
     try:
-        # Fetch data
-        dfs = fetch_ohlcv(ticker, period="2d", intervals=("1m","15m","1h"))
-        
-        # Detect pattern on 1h
-        pattern = None
-        if "1h" in dfs and not dfs["1h"].empty:
-            pattern = detect_patterns(dfs["1h"])
-        
-        # Sentiment
-        headlines = fetch_news_headlines(ticker, limit=5)
-        sent_score, sent_reasons = score_sentiment(headlines, ticker)
-        
-        # Quant: ARIMA + LSTM per timeframe
-        quant_result = {"last_price": None, "tf": {}}
-        
-        for tf, df in dfs.items():
-            if df.empty:
-                quant_result["tf"][tf] = {
-                    "arima_pred": None, "arima_ret": None, 
-                    "lstm_pred": None, "lstm_ret": None
-                }
-                continue
-            
-            try:
-                last = float(df['Close'].iloc[-1])
-                quant_result["last_price"] = last
-            except Exception:
-                last = None
-            
-            # ARIMA
-            arima_pred = arima_one_step_forecast(df['Close']) if len(df['Close'])>10 else None
-            arima_ret = (arima_pred - last)/last if arima_pred and last else None
-            
-            # LSTM
-            model_path = os.path.join(LSTM_MODEL_DIR, f"{ticker}_{tf}_lstm.h5")
-            lstm_preds = predict_lstm(model_path, df['Close'].astype(float).tolist(), window=32, steps=1) if os.path.exists(model_path) else []
-            lstm_pred = lstm_preds[0] if lstm_preds else None
-            lstm_ret = (lstm_pred - last)/last if lstm_pred and last else None
-
-            quant_result["tf"][tf] = {
-                "arima_pred": arima_pred, "arima_ret": arima_ret, 
-                "lstm_pred": lstm_pred, "lstm_ret": lstm_ret
-            }
-            
-            # Store predictions for MCP
-            if arima_pred:
-                store_prediction(ticker, tf, "arima", datetime.utcnow().isoformat(), 
-                               60 if tf=="1h" else (15 if tf=="15m" else 1), arima_pred)
-            if lstm_pred:
-                store_prediction(ticker, tf, "lstm", datetime.utcnow().isoformat(), 
-                               60 if tf=="1h" else (15 if tf=="15m" else 1), lstm_pred)
-        
-        # Combine
-        decision = ensemble.combine(ticker, quant_result, sent_score)
+        result = await engine.analyze(ticker, request.timeframes)
         
         return {
             "ticker": ticker,
-            "pattern": pattern,
-            "sentiment_score": sent_score,
-            "quant_result": quant_result,
-            "decision": decision,
-            "timestamp": datetime.utcnow().isoformat()
+            "timeframes": result["timeframes"],
+            "pattern": result["pattern"],
+            "sentiment_score": result["sentiment_score"],
+            "quant_result": result["quant_result"],
+            "decision": result["decision"],
+            "timings": result["timings"],
+            "timestamp": result["timestamp"]
         }
     
     except Exception as e:
         logger.error(f"Error analyzing {ticker}: {e}")
         return {"error": str(e)}, 500
 
+@api_router.post("/scan")
+async def scan_watchlist(request: ScanRequest):
+    """ARIMA one-step forecasts for a list of tickers"""
+    try:
+        results = await engine.scan_arima(request.tickers, interval=request.interval)
+        return {"interval": request.interval, "results": results}
+    except Exception as e:
+        logger.error(f"Error scanning watchlist: {e}")
+        return {"error": str(e)}, 500
+
+@api_router.post("/sentiment-scan")
+async def scan_sentiment(request: ScanRequest):
+    """News sentiment for a list of tickers"""
+    try:
+        return {"results": await engine.scan_sentiment(request.tickers)}
+    except Exception as e:
+        logger.error(f"Error scanning sentiment: {e}")
+        return {"error": str(e)}, 500
+
 @api_router.get("/predictions")
 async def get_predictions():
     """Get recent predictions"""
     try:
-        preds = get_recent_predictions(limit=20)
+        preds = await run_io(get_recent_predictions, limit=20)
         return {
             "predictions": [
                 {
@@ -184,12 +160,21 @@ async def get_predictions():
 async def get_ticker_stats(ticker: str, timeframe: str):
     """Get model performance stats for a ticker"""
     try:
-        stats = get_model_stats(ticker.upper(), timeframe)
-        return {"ticker": ticker, "timeframe": timeframe, "stats": stats}
+        stats = await run_io(get_model_stats, ticker.upper(), timeframe)
+        # Decayed and windowed MAE / MAPE / hit rate alongside the lifetime MAE
+        error_stats = await run_io(get_error_stats, ticker.upper(), timeframe)
+        return {"ticker": ticker, "timeframe": timeframe, "stats": stats, "error_stats": error_stats}
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
         return {"error": str(e)}, 500
 
+@api_router.get("/cache-stats")
+async def get_cache_stats():
+    """Get OHLCV, LSTM model registry, ARIMA, sentiment and news cache counters"""
+    return {"ohlcv": ohlcv_cache.stats(), "lstm_models": model_registry.stats(),
+            "arima": {"states": engine.arima.stats, "pool": arima_service.stats},
+            "sentiment": sentiment_cache.stats(), "news": news_fetcher.stats}
+
 @api_router.post("/webhook")
 async def telegram_webhook(request: Request):
     """Handle Telegram webhook updates"""
@@ -204,7 +189,7 @@ async def telegram_webhook(request: Request):
     text = message.get("text", "").strip()
     
     if not text:
-        send_msg(chat_id, "Please send a ticker symbol to analyze (e.g., TSLA, AAPL)")
+        await run_io(send_msg, chat_id, "Please send a ticker symbol to analyze (e.g., TSLA, AAPL)")
         return {"ok": True}
     
     # Extract ticker from message
@@ -217,75 +202,23 @@ async def telegram_webhook(request: Request):
             break
     
     if not ticker:
-        send_msg(chat_id, "Please send a valid ticker symbol (e.g., `analyze TSLA` or just `TSLA`)")
+        await run_io(send_msg, chat_id, "Please send a valid ticker symbol (e.g., `analyze TSLA` or just `TSLA`)")
         return {"ok": True}
     
     # Send processing message
-    send_msg(chat_id, f"\ud83d\udd0d Analyzing {ticker}... Please wait.")
+    await run_io(send_msg, chat_id, f"\ud83d\udd0d Analyzing {ticker}... Please wait.")
     
     try:
-        # Fetch data
-        dfs = fetch_ohlcv(ticker, period="2d", intervals=("1m","15m","1h"))
-        
-        # Detect pattern
-        pattern = None
-        if "1h" in dfs and not dfs["1h"].empty:
-            pattern = detect_patterns(dfs["1h"])
-        
-        # Sentiment
-        headlines = fetch_news_headlines(ticker, limit=5)
-        sent_score, sent_reasons = score_sentiment(headlines, ticker)
-        
-        # Quant analysis
-        quant_result = {"last_price": None, "tf": {}}
-        
-        for tf, df in dfs.items():
-            if df.empty:
-                quant_result["tf"][tf] = {
-                    "arima_pred": None, "arima_ret": None,
-                    "lstm_pred": None, "lstm_ret": None
-                }
-                continue
-            
-            try:
-                last = float(df['Close'].iloc[-1])
-                quant_result["last_price"] = last
-            except Exception:
-                last = None
-            
-            # ARIMA
-            arima_pred = arima_one_step_forecast(df['Close']) if len(df['Close'])>10 else None
-            arima_ret = (arima_pred - last)/last if arima_pred and last else None
-            
-            # LSTM
-            model_path = os.path.join(LSTM_MODEL_DIR, f"{ticker}_{tf}_lstm.h5")
-            lstm_preds = predict_lstm(model_path, df['Close'].astype(float).tolist(), window=32, steps=1) if os.path.exists(model_path) else []
-            lstm_pred = lstm_preds[0] if lstm_preds else None
-            lstm_ret = (lstm_pred - last)/last if lstm_pred and last else None
-
-            quant_result["tf"][tf] = {
-                "arima_pred": arima_pred, "arima_ret": arima_ret,
-                "lstm_pred": lstm_pred, "lstm_ret": lstm_ret
-            }
-            
-            # Store predictions
-            if arima_pred:
-                store_prediction(ticker, tf, "arima", datetime.utcnow().isoformat(),
-                               60 if tf=="1h" else (15 if tf=="15m" else 1), arima_pred)
-            if lstm_pred:
-                store_prediction(ticker, tf, "lstm", datetime.utcnow().isoformat(),
-                               60 if tf=="1h" else (15 if tf=="15m" else 1), lstm_pred)
-        
-        # Make decision
-        decision = ensemble.combine(ticker, quant_result, sent_score)
+        result = await engine.analyze(ticker)
         
         # Format report
-        report_text = format_short_report(ticker, pattern, sent_score, sent_reasons, quant_result, decision)
-        send_msg(chat_id, report_text)
+        report_text = format_short_report(ticker, result["pattern"], result["sentiment_score"],
+                                          result["sentiment_reasons"], result["quant_result"], result["decision"])
+        await run_io(send_msg, chat_id, report_text)
         
     except Exception as e:
         logger.error(f"Error processing {ticker}: {e}")
-        send_msg(chat_id, f"\u274c Error analyzing {ticker}: {str(e)}")
+        await run_io(send_msg, chat_id, f"\u274c Error analyzing {ticker}: {str(e)}")
     
     return {"ok": True}
 
@@ -310,10 +243,19 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup():
     """Initialize database and scheduler on startup"""
-    init_db()
+    # Migrations and the writer thread start off the loop, like every other DB call
+    await run_io(init_db)
+    # Ensemble weights are served from memory from here on
+    await run_io(engine.ensemble.adaptive.load)
     start_scheduler()
+    # Spawn ARIMA workers now so the first request doesn't pay the statsmodels import
+    await run_io(arima_service.warm)
     logger.info("Financial AI Agent started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+    shutdown_executors()
+    arima_service.shutdown()
+    engine.ensemble.adaptive.close()
+    close_databases()
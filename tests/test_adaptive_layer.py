@@ -0,0 +1,60 @@
+import pytest
+
+import adaptive_layer
+import perf_db
+from db import Database
+
+
+@pytest.fixture
+def layer(tmp_path, monkeypatch):
+    db = Database(str(tmp_path / "perf.db"))
+    monkeypatch.setattr(perf_db, "get_db", lambda path=None: db)
+    perf_db.init_db()
+    layer = adaptive_layer.AdaptiveLayer(metric="mae", half_life="lifetime")
+    layer.load()
+    yield layer, db
+    layer.close()
+    db.close()
+
+
+def test_weights_follow_committed_resolutions_without_db_reads(layer, monkeypatch):
+    layer, db = layer
+    for model, pred in (("arima", 101.0), ("lstm", 97.0)):
+        perf_db.store_prediction("AAPL", "1h", model, "2024-01-01T00:00:00", 60, pred, 100.0)
+    db.flush()
+    ids = [r[0] for r in db.query("SELECT id FROM predictions ORDER BY id")]
+
+    monkeypatch.setattr(adaptive_layer, "get_all_error_stats", lambda: pytest.fail("weights read the DB"))
+    perf_db.resolve_predictions([(ids[0], 100.0), (ids[1], 100.0)]).result(5)
+    assert layer.compute_model_weights("AAPL", "1h") == pytest.approx({"arima": 0.75, "lstm": 0.25})
+
+
+def test_failed_load_is_not_retried_per_call(layer, monkeypatch):
+    layer, _ = layer
+    calls = []
+    def failing():
+        calls.append(1)
+        raise RuntimeError("db down")
+    monkeypatch.setattr(adaptive_layer, "get_all_error_stats", failing)
+    fresh = adaptive_layer.AdaptiveLayer(metric="mae", half_life="lifetime")
+    try:
+        for _ in range(5):
+            assert fresh.compute_model_weights("AAPL", "1h") == {"arima": 0.5, "lstm": 0.5}
+        assert len(calls) == 1
+    finally:
+        fresh.close()
+
+
+def test_close_removes_listener(layer):
+    layer, _ = layer
+    assert layer.on_stats in perf_db._stats_listeners
+    layer.close()
+    assert layer.on_stats not in perf_db._stats_listeners
+
+
+def test_rejects_untracked_half_life_and_unknown_metric(layer):
+    layer, _ = layer
+    with pytest.raises(ValueError):
+        layer.compute_model_weights("AAPL", "1h", half_life=12345)
+    with pytest.raises(ValueError):
+        layer.compute_model_weights("AAPL", "1h", metric="rmse")
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from db import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "t.db"))
+    with db.transaction() as con:
+        con.execute("CREATE TABLE t (v INTEGER)")
+    yield db
+    db.close()
+
+
+def _insert(con, v):
+    con.execute("INSERT INTO t (v) VALUES (?)", (v,))
+    return v
+
+def _insert_then_fail(con, v):
+    con.execute("INSERT INTO t (v) VALUES (?)", (v,))
+    raise RuntimeError("boom")
+
+
+def _hold_writer(db):
+    """Block the writer thread so the next jobs are applied as one batch"""
+    started, release = threading.Event(), threading.Event()
+    db.write(lambda con: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    return release
+
+
+def test_failing_job_rolls_back_to_its_savepoint(db):
+    release = _hold_writer(db)
+    transactions = db.stats["transactions"]
+    futs = [db.write(_insert, 1), db.write(_insert_then_fail, 2), db.write(_insert, 3)]
+    release.set()
+
+    assert futs[0].result(5) == 1 and futs[2].result(5) == 3
+    with pytest.raises(RuntimeError):
+        futs[1].result(5)
+    assert sorted(v for (v,) in db.query("SELECT v FROM t")) == [1, 3]
+    # The three jobs shared one transaction (plus the one holding the writer)
+    assert db.stats["transactions"] - transactions == 2
+    assert db.stats["failed_writes"] == 1
+
+
+def test_flush_waits_for_queued_writes(db):
+    release = _hold_writer(db)
+    for v in range(50):
+        db.write(_insert, v)
+    release.set()
+    db.flush()
+    # Visible from a connection on another thread once flush returns
+    out = []
+    t = threading.Thread(target=lambda: out.append(db.query_one("SELECT COUNT(*) FROM t")[0]))
+    t.start()
+    t.join()
+    assert out == [50]
+
+
+def test_close_applies_pending_writes_and_stops_writer(db):
+    release = _hold_writer(db)
+    futs = [db.write(_insert, v) for v in range(10)]
+    writer = db._writer
+    release.set()
+    db.close()
+    assert not writer.is_alive()
+    assert all(f.done() for f in futs)
+    assert db.query_one("SELECT COUNT(*) FROM t")[0] == 10
+
+    # A later write starts a fresh writer
+    assert db.write(_insert, 99).result(5) == 99
+
+
+def test_connections_use_wal(db):
+    assert db.query_one("PRAGMA journal_mode")[0] == "wal"
@@ -0,0 +1,46 @@
+import pytest
+
+import ensemble_agent
+from ensemble_agent import EnsembleAgent
+
+
+class _Adaptive:
+    def compute_model_weights(self, ticker, timeframe):
+        return {"arima": 0.5, "lstm": 0.5}
+
+    def compute_timeframe_weights(self, ticker, timeframes):
+        return {tf: 1.0 for tf in timeframes}
+
+
+@pytest.fixture
+def agent():
+    agent = EnsembleAgent.__new__(EnsembleAgent)
+    agent.adaptive = _Adaptive()
+    agent.base = {"indicators": 0.35, "numeric": 0.45, "sentiment": 0.2}
+    return agent
+
+
+@pytest.mark.parametrize("combined, action", [
+    (0.3, "HOLD"), (0.3001, "BUY"), (-0.3, "HOLD"), (-0.3001, "SELL"), (0.0, "HOLD"),
+])
+def test_decision_boundary(combined, action):
+    assert EnsembleAgent._decide(combined)[0] == action
+
+
+def test_indicator_score_is_on_the_return_scale(agent):
+    strong = {"tf": {"1h": {"indicators": {"score": 1.0}, "arima_ret": 0.002, "lstm_ret": 0.002}}}
+    out = agent.combine("AAPL", strong, 0.0)
+    assert out["indicator_score"] == pytest.approx(ensemble_agent.INDICATOR_RET_SCALE)
+    assert out["combined"] == pytest.approx(0.35 * ensemble_agent.INDICATOR_RET_SCALE + 0.45 * 0.002)
+    # A maxed-out indicator reading weighs like a forecast return, not like full-strength sentiment
+    assert out["action"] == "HOLD"
+
+
+def test_combined_boundary_with_a_maxed_indicator(agent):
+    # 0.35*0.01 + 0.45*0.3 = 0.1385 before sentiment; BUY needs the total above 0.3
+    quant = {"tf": {"1h": {"indicators": {"score": 1.0}, "arima_ret": 0.3, "lstm_ret": 0.3}}}
+    assert agent.combine("AAPL", quant, 0.80)["action"] == "HOLD"
+    assert agent.combine("AAPL", quant, 0.81)["action"] == "BUY"
+    quant = {"tf": {"1h": {"indicators": {"score": -1.0}, "arima_ret": -0.3, "lstm_ret": -0.3}}}
+    assert agent.combine("AAPL", quant, -0.80)["action"] == "HOLD"
+    assert agent.combine("AAPL", quant, -0.81)["action"] == "SELL"
@@ -0,0 +1,38 @@
+import threading
+import time
+
+from executors import KeyedLocks
+
+
+def test_keyed_locks_serialise_one_key_and_prune():
+    locks = KeyedLocks()
+    active, overlap = [0], [False]
+
+    def work():
+        with locks.hold("AAPL"):
+            active[0] += 1
+            overlap[0] |= active[0] > 1
+            time.sleep(0.01)
+            active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not overlap[0]
+    assert len(locks) == 0
+
+
+def test_keyed_locks_do_not_block_other_keys():
+    locks = KeyedLocks()
+    with locks.hold("AAPL"):
+        done = threading.Event()
+
+        def other():
+            with locks.hold("MSFT"):
+                done.set()
+
+        threading.Thread(target=other).start()
+        assert done.wait(1)
+    assert len(locks) == 0
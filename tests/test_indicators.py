@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from indicators import COLUMNS, IndicatorEngine, IndicatorState, compute_indicators
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"Close": close}, index=pd.date_range("2024-01-01", periods=n, freq="min"))
+
+
+def _streamed(df):
+    st = IndicatorState()
+    rows = [st.push(ts, x) for ts, x in zip(df.index, df["Close"])]
+    return pd.DataFrame(rows, index=df.index)[COLUMNS].astype(float)
+
+
+def test_streaming_matches_batch_over_long_series():
+    df = _frame(20000)
+    # Residual differences come from pandas' own rolling variance (~3e-10 at these prices)
+    np.testing.assert_allclose(_streamed(df).values, compute_indicators(df)[COLUMNS].values,
+                               rtol=1e-9, atol=1e-8)
+
+
+def test_peek_does_not_commit():
+    df = _frame(100, seed=1)
+    st = IndicatorState()
+    for ts, x in zip(df.index[:-1], df["Close"][:-1]):
+        st.push(ts, x)
+    before = st.peek(123.0)
+    st.peek(50.0)
+    assert st.peek(123.0) == before
+    last = df["Close"].iloc[-1]
+    assert st.peek(last) == st.push(df.index[-1], last)
+
+
+def test_engine_incremental_updates_match_batch():
+    df = _frame(300, seed=2)
+    engine = IndicatorEngine()
+    for end in (120, 121, 200, 300):
+        snap = engine.update("T", "1m", df.iloc[:end])
+    expected = compute_indicators(df).iloc[-1]
+    for c in COLUMNS:
+        np.testing.assert_allclose(snap[c], expected[c], rtol=1e-9, atol=1e-8)
+    assert engine.stats["rebuilds"] == 1
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from lstm_numpy import NumpyLSTM, save_lstm_artifact, load_lstm_artifact
+from lstm_model import KerasForecaster
+
+
+def _random_model(window=12, units=8, seed=0):
+    """Small LSTM -> Dense(1) with every weight randomised, including the biases"""
+    tf.keras.utils.set_random_seed(seed)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(window, 1)),
+        tf.keras.layers.LSTM(units),
+        tf.keras.layers.Dense(1),
+    ])
+    rng = np.random.default_rng(seed)
+    model.set_weights([rng.normal(0, 0.5, w.shape).astype(np.float32) for w in model.get_weights()])
+    return model
+
+
+def _numpy_lstm(model):
+    kernel, recurrent, bias = model.layers[0].get_weights()
+    dense_w, dense_b = model.layers[1].get_weights()
+    return NumpyLSTM(kernel, recurrent, bias, dense_w, dense_b, model.input_shape[1])
+
+
+def test_one_step_matches_keras():
+    model = _random_model()
+    x = np.random.default_rng(1).random((32, 12), dtype=np.float32)
+    expected = model(x[..., None], training=False).numpy()[:, 0]
+    np.testing.assert_allclose(_numpy_lstm(model).forecast(x, 1)[:, 0], expected, rtol=1e-4, atol=1e-5)
+
+
+def test_autoregressive_steps_match_keras():
+    model = _random_model(seed=2)
+    x = np.random.default_rng(3).random((16, 12), dtype=np.float32)
+    expected = KerasForecaster(model).forecast(x, 4)
+    np.testing.assert_allclose(_numpy_lstm(model).forecast(x, 4), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_stacked_group_matches_each_model():
+    models = [_random_model(seed=s) for s in (4, 5)]
+    numpy_models = [_numpy_lstm(m) for m in models]
+    x = np.random.default_rng(6).random((6, 12), dtype=np.float32)
+    rows = [numpy_models[i % 2] for i in range(6)]
+    out = numpy_models[0].forecast_group(rows, x, 2)
+    for i, m in enumerate(rows):
+        np.testing.assert_allclose(out[i], m.forecast(x[i:i+1], 2)[0], rtol=1e-5, atol=1e-6)
+
+
+def test_artifact_round_trip(tmp_path):
+    model = _random_model(seed=7)
+    path = save_lstm_artifact(str(tmp_path / "m_lstm.npz"), model, [10.0], [0.5], {"ticker": "T"})
+    loaded, scaler, meta = load_lstm_artifact(path)
+    x = np.random.default_rng(8).random((4, 12), dtype=np.float32)
+    np.testing.assert_allclose(loaded.forecast(x, 3), _numpy_lstm(model).forecast(x, 3))
+    assert meta["ticker"] == "T" and meta["window"] == 12
+    np.testing.assert_allclose(scaler.inverse_transform(scaler.transform(np.array([12.0]))), [12.0])
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from market_data import ReplayProvider
+
+
+def _write_dst_fixture(root):
+    """Hourly session bars from Fri 2024-03-08 to Tue 2024-03-12; US DST starts on the 10th"""
+    days = pd.bdate_range("2024-03-08", "2024-03-12")
+    idx = pd.DatetimeIndex([d + pd.Timedelta(hours=9, minutes=30) + pd.Timedelta(hours=h)
+                            for d in days for h in range(7)]).tz_localize("America/New_York")
+    df = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": range(len(idx)), "Volume": 10}, index=idx)
+    df.to_csv(root / "AAPL_1h.csv")
+    return df
+
+
+def test_csv_spanning_dst_change_parses_to_datetimes(tmp_path):
+    recorded = _write_dst_fixture(tmp_path)
+    df = ReplayProvider(str(tmp_path))._load("AAPL", "1h")
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert str(df.index.tz) == "America/New_York"
+    assert (df.index == recorded.index).all()
+
+
+def test_period_and_start_requests_across_dst(tmp_path):
+    _write_dst_fixture(tmp_path)
+    provider = ReplayProvider(str(tmp_path))
+
+    two_days = provider.download(["AAPL"], "1h", period="2d")["AAPL"]
+    assert sorted(set(two_days.index.date.astype(str))) == ["2024-03-11", "2024-03-12"]
+
+    since = provider.download(["AAPL"], "1h", start=pd.Timestamp("2024-03-12 14:30", tz="UTC"))["AAPL"]
+    # 14:30 UTC is 10:30 EDT on the 12th
+    assert since.index[0] == pd.Timestamp("2024-03-12 10:30", tz="America/New_York")
+    assert len(since) == 6
+
+    assert provider.download(["MSFT"], "1h", period="2d")["MSFT"].empty
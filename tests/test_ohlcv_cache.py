@@ -0,0 +1,55 @@
+import pandas as pd
+
+from ohlcv_cache import OHLCVCache, trim_to_period
+
+
+def _sessions(end="2024-07-12"):
+    """Hourly bars for every weekday in the 60 days up to ``end`` (7 bars per session)"""
+    days = pd.bdate_range(end=end, periods=60)
+    idx = pd.DatetimeIndex([d + pd.Timedelta(hours=9, minutes=30) + pd.Timedelta(hours=h)
+                            for d in days for h in range(7)]).tz_localize("America/New_York")
+    return pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": range(len(idx)), "Volume": 1}, index=idx)
+
+
+class _Source:
+    def __init__(self):
+        self.frame = _sessions()
+        self.calls = []
+
+    def __call__(self, ticker, interval, period=None, start=None):
+        self.calls.append((period, start))
+        if start is not None:
+            return self.frame[self.frame.index >= start]
+        return trim_to_period(self.frame, period)
+
+
+def test_long_fetch_then_short_read_returns_short_window():
+    source = _Source()
+    cache = OHLCVCache(source)
+    short = cache.get("AAPL", "1h", period="2d")
+    assert len(short) == 14
+
+    assert len(cache.get("AAPL", "1h", period="30d")) == 30 * 7
+    again = cache.get("AAPL", "1h", period="2d")
+    pd.testing.assert_frame_equal(again, short)
+    assert len(source.calls) == 2  # the short read was served from the long entry
+
+
+def test_incremental_refresh_of_long_entry_returns_requested_window():
+    source = _Source()
+    cache = OHLCVCache(source, ttl={"1h": 0})
+    cache.get("AAPL", "1h", period="30d")
+    source.frame = _sessions("2024-07-15")  # one more session published
+
+    refreshed = cache.get("AAPL", "1h", period="2d")
+    assert source.calls[-1][0] is None  # incremental download from the last bar
+    assert len(refreshed) == 14
+    assert refreshed.index[-1] == source.frame.index[-1]
+
+
+def test_trim_to_period_counts_trading_days_and_calendar_spans():
+    df = _sessions()
+    assert trim_to_period(df, "1d").index.normalize().nunique() == 1
+    assert trim_to_period(df, "5d").index.normalize().nunique() == 5
+    assert trim_to_period(df, "1wk").index.normalize().nunique() == 5
+    assert len(trim_to_period(df, "max")) == len(df)
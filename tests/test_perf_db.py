@@ -0,0 +1,67 @@
+import pytest
+
+import perf_db
+from db import Database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    db = Database(str(tmp_path / "perf.db"))
+    monkeypatch.setattr(perf_db, "get_db", lambda path=None: db)
+    yield db
+    db.close()
+
+
+def test_migration_merges_duplicate_model_stats(db):
+    # A pre-migration database: base tables, no user_version, duplicate stats rows
+    con = db.connection()
+    perf_db._m1_base_tables(con)
+    con.executemany("INSERT INTO model_stats (ticker, timeframe, model, mean_abs_error, count, last_updated) VALUES (?,?,?,?,?,?)",
+                    [("AAPL", "1h", "arima", 1.0, 1, "2024-01-01"),
+                     ("AAPL", "1h", "arima", 4.0, 3, "2024-01-03"),
+                     ("AAPL", "1h", "lstm", 2.0, 2, "2024-01-02")])
+
+    assert perf_db.migrate(db) == perf_db.MIGRATIONS[-1][0]
+
+    rows = db.query("SELECT model, mean_abs_error, count, last_updated FROM model_stats ORDER BY model")
+    assert rows == [("arima", 3.25, 4, "2024-01-03"), ("lstm", 2.0, 2, "2024-01-02")]
+    with pytest.raises(Exception):
+        con.execute("INSERT INTO model_stats (ticker, timeframe, model, mean_abs_error, count) VALUES ('AAPL','1h','lstm',1,1)")
+
+    # Re-running is a no-op
+    assert perf_db.migrate(db) == perf_db.MIGRATIONS[-1][0]
+    assert db.query_one("SELECT COUNT(*) FROM model_stats")[0] == 2
+
+
+def _stats(db):
+    return (db.query("SELECT model, mean_abs_error, count FROM model_stats ORDER BY model"),
+            db.query("SELECT model, basis, weight, abs_sum, seq FROM error_stats ORDER BY model, basis"))
+
+
+def test_replayed_resolution_batch_does_not_double_count(db):
+    perf_db.init_db()
+    for model, pred in (("arima", 101.0), ("lstm", 98.0)):
+        perf_db.store_prediction("AAPL", "1h", model, "2024-01-01T00:00:00", 60, pred, 100.0)
+    db.flush()
+    ids = [r[0] for r in db.query("SELECT id FROM predictions ORDER BY id")]
+    batch = [(ids[0], 102.0), (ids[1], 102.0)]
+
+    changed = perf_db.resolve_predictions(batch).result(5)
+    assert {(r[2], r[3]) for r in changed} >= {("arima", "lifetime"), ("lstm", "lifetime")}
+    first = _stats(db)
+    assert first[0] == [("arima", 1.0, 1), ("lstm", 4.0, 1)]
+
+    # The scheduler can resend a batch (e.g. after a timeout); it must change nothing
+    perf_db.resolve_predictions(batch).result(5)
+    perf_db.resolve_prediction(ids[0], 102.0).result(5)
+    assert _stats(db) == first
+
+
+def test_expired_predictions_are_not_counted(db):
+    perf_db.init_db()
+    perf_db.store_prediction("AAPL", "1h", "arima", "2024-01-01T00:00:00", 60, 101.0, 100.0)
+    db.flush()
+    pred_id = db.query_one("SELECT id FROM predictions")[0]
+    perf_db.resolve_predictions([], [pred_id]).result(5)
+    assert db.query_one("SELECT resolved FROM predictions")[0] == -1
+    assert db.query_one("SELECT COUNT(*) FROM model_stats")[0] == 0
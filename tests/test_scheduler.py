@@ -0,0 +1,71 @@
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import scheduler
+
+
+def _hourly_session(day="2024-07-01"):
+    idx = pd.date_range(f"{day} 09:30", f"{day} 15:30", freq="60min", tz="America/New_York")
+    return pd.DataFrame({"Close": np.arange(len(idx), dtype=float) + 100}, index=idx)
+
+
+def test_last_hourly_bar_ends_at_session_close():
+    df = _hourly_session()
+    ends = scheduler.bar_ends(df.index, "1h")
+    assert ends[-1] == pd.Timestamp("2024-07-01 20:00")  # 16:00 EDT, not 16:30
+    assert ends[-2] == pd.Timestamp("2024-07-01 19:30")
+
+    # 15:45 local falls inside the (shortened) last bar: priced by the 14:30 bar
+    assert scheduler.price_at(df, "1h", [datetime(2024, 7, 1, 19, 45)]).tolist() == [105.0]
+
+    # 16:15 local waits for data past it; then the 15:30 bar prices it, not the 14:30 one
+    assert np.isnan(scheduler.price_at(df, "1h", [datetime(2024, 7, 1, 20, 15)])[0])
+    both = pd.concat([df, _hourly_session("2024-07-02")])
+    assert scheduler.price_at(both, "1h", [datetime(2024, 7, 1, 20, 15)]).tolist() == [106.0]
+
+
+def test_round_the_clock_bars_are_not_clamped():
+    idx = pd.date_range("2024-07-01 00:00", periods=24, freq="60min", tz="UTC")
+    ends = scheduler.bar_ends(idx, "1h")
+    assert (ends - pd.DatetimeIndex(idx).tz_localize(None) == pd.Timedelta(hours=1)).all()
+
+
+def test_periods_are_per_ticker_and_unpriceable_predictions_expire(monkeypatch):
+    now = datetime.utcnow()
+    def at(delta):
+        return (now - delta).isoformat()
+    rows = [
+        (1, "AAPL", "1m", "arima", at(timedelta(minutes=30)), 1),
+        (2, "BAD", "1m", "arima", at(timedelta(days=5)), 1),
+        (3, "OLD", "1m", "arima", at(timedelta(days=8)), 1),
+    ]
+    calls, resolved = [], []
+
+    def fetch(tickers, intervals, period):
+        calls.append((tuple(tickers), intervals, period))
+        frames = {}
+        for t in tickers:
+            if t == "BAD":
+                frames[t] = {intervals[0]: pd.DataFrame()}
+            else:
+                idx = pd.date_range(now - timedelta(hours=2), now, freq="1min")
+                frames[t] = {intervals[0]: pd.DataFrame({"Close": np.full(len(idx), 50.0)}, index=idx)}
+        return frames
+
+    def resolve(resolutions, expired=()):
+        resolved.append((list(resolutions), list(expired)))
+        fut = Future()
+        fut.set_result([])
+        return fut
+
+    monkeypatch.setattr(scheduler, "get_due_predictions", lambda now_iso: rows)
+    monkeypatch.setattr(scheduler, "fetch_ohlcv_many", fetch)
+    monkeypatch.setattr(scheduler, "resolve_predictions", resolve)
+    scheduler.check_and_resolve()
+
+    # AAPL is not dragged into BAD's longer download; OLD is never downloaded
+    assert sorted(calls) == [(("AAPL",), ("1m",), "2d"), (("BAD",), ("1m",), "7d")]
+    assert resolved == [([(1, 50.0)], [3])]
@@ -0,0 +1,29 @@
+import asyncio
+
+import sentiment_analyzer
+from sentiment_service import GeminiBackend, SentimentService
+
+
+class _Cache:
+    def get_many(self, model, texts):
+        return {}
+
+    def put_many(self, model, scores):
+        raise AssertionError("nothing should be cached")
+
+
+class _HungModel:
+    async def generate_content_async(self, prompt, request_options=None):
+        await asyncio.sleep(60)
+
+
+def test_gemini_timeout_fails_the_pack_and_falls_back_to_textblob(monkeypatch):
+    backend = GeminiBackend(api_key=None, timeout=0.05)
+    backend._model = _HungModel()
+    monkeypatch.setattr(sentiment_analyzer, "score_sentiment_textblob", lambda texts: (0.5, [(texts[0], 0.5)]))
+    service = SentimentService(backend, cache=_Cache())
+
+    out = asyncio.run(asyncio.wait_for(service.score_many({"AAPL": ["Apple beats estimates"]}), 5))
+    assert out == {"AAPL": (0.5, [("Apple beats estimates", 0.5)])}
+    assert service.stats["failed_calls"] == 1
+    assert service.stats["rate_limited"] == 0